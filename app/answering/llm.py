@@ -0,0 +1,118 @@
+import asyncio
+import re
+from typing import AsyncIterator, Optional, Protocol
+
+from app.answering.retrieval import RetrievedChunk
+from app.core.config import settings
+
+_WORD = re.compile(r"\S+\s*")
+
+SYSTEM_PROMPT = (
+    "You answer questions about a business using only the numbered context passages. "
+    "Cite the passages you rely on as [1], [2], ... If the passages do not contain the "
+    "answer, say that you don't know."
+)
+
+
+def build_messages(question: str, chunks: list[RetrievedChunk]) -> list[dict]:
+    context = "\n\n".join(
+        f"[{number}] {chunk.text}" for number, chunk in enumerate(chunks, start=1)
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
+    ]
+
+
+class ChatModel(Protocol):
+    model: str
+
+    async def answer(self, question: str, chunks: list[RetrievedChunk]) -> str:
+        ...
+
+    def stream(self, question: str, chunks: list[RetrievedChunk]) -> AsyncIterator[str]:
+        """Yield the answer as text deltas while it is generated."""
+        ...
+
+
+class OpenAIChatModel:
+    def __init__(self, model: str, max_tokens: int):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self.max_tokens = max_tokens
+        self._client = AsyncOpenAI()
+
+    async def answer(self, question: str, chunks: list[RetrievedChunk]) -> str:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=build_messages(question, chunks),
+            max_tokens=self.max_tokens,
+            temperature=0,
+        )
+        return response.choices[0].message.content or ""
+
+    async def stream(self, question: str, chunks: list[RetrievedChunk]) -> AsyncIterator[str]:
+        stream = await self._client.chat.completions.create(
+            model=self.model,
+            messages=build_messages(question, chunks),
+            max_tokens=self.max_tokens,
+            temperature=0,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response makes the API stop generating when the
+            # consumer goes away early, e.g. on a client disconnect.
+            await stream.close()
+
+
+class ExtractiveChatModel:
+    """
+    Answers with the best matching passage instead of calling a model. Enough
+    for tests and local development without a model provider.
+
+    `stream` yields the passage word by word, `delay` seconds apart, so it also
+    serves as a fake streaming model.
+    """
+
+    model = "extractive"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def answer(self, question: str, chunks: list[RetrievedChunk]) -> str:
+        return chunks[0].text if chunks else ""
+
+    async def stream(self, question: str, chunks: list[RetrievedChunk]) -> AsyncIterator[str]:
+        for word in _WORD.findall(await self.answer(question, chunks)):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word
+
+
+_chat_model: Optional[ChatModel] = None
+
+
+def get_chat_model() -> ChatModel:
+    global _chat_model
+    if _chat_model is None:
+        if settings.LLM_PROVIDER == "extractive":
+            _chat_model = ExtractiveChatModel()
+        else:
+            _chat_model = OpenAIChatModel(settings.LLM_MODEL, settings.LLM_MAX_TOKENS)
+    return _chat_model
+
+
+def close_chat_model() -> None:
+    global _chat_model
+    _chat_model = None
+
+
+def set_chat_model(chat_model: ChatModel) -> None:
+    """Swap the process-wide chat model, e.g. for a fake in tests."""
+    global _chat_model
+    _chat_model = chat_model
@@ -0,0 +1,121 @@
+import asyncio
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.ingestion.sparse import SPARSE_VECTOR_NAME, SparseVector
+
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient, models
+
+
+@dataclass(frozen=True)
+class RetrievedChunk:
+    upload_id: str
+    chunk_index: int
+    # Page (PDF) or paragraph (DOCX) number the chunk starts in.
+    source: int
+    text: str
+    score: float
+
+
+async def _query_business_chunks(
+        client: "AsyncQdrantClient", collection_name: str, business_id: str, query: Any,
+        limit: int, using: Optional[str] = None,
+        search_params: Optional["models.SearchParams"] = None,
+) -> list[RetrievedChunk]:
+    from qdrant_client import models
+
+    if not business_id:
+        raise ValueError("Chunk searches must be filtered on a business")
+
+    response = await client.query_points(
+        collection_name,
+        query=query,
+        using=using,
+        query_filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="business_id", match=models.MatchValue(value=business_id)
+                )
+            ]
+        ),
+        limit=limit,
+        search_params=search_params,
+        with_payload=True,
+    )
+    return [
+        RetrievedChunk(
+            upload_id=point.payload["upload_id"],
+            chunk_index=point.payload["chunk_index"],
+            source=point.payload["source"],
+            text=point.payload["text"],
+            score=point.score,
+        )
+        for point in response.points
+    ]
+
+
+async def search_business_chunks(
+        client: "AsyncQdrantClient", collection_name: str, business_id: str,
+        vector: list[float], limit: int, search_params: Optional["models.SearchParams"] = None,
+) -> list[RetrievedChunk]:
+    """
+    The `limit` chunks of a business closest to `vector`, best first. Searches
+    are always filtered on the tenant's `business_id`.
+    """
+    return await _query_business_chunks(
+        client, collection_name, business_id, vector, limit, search_params=search_params,
+    )
+
+
+def reciprocal_rank_fusion(rankings: list[list[RetrievedChunk]], k: int) -> list[RetrievedChunk]:
+    """
+    Merge rankings by summing 1 / (k + rank) for every ranking a chunk is in,
+    best first. The fused score replaces the chunk's score.
+    """
+    scores: dict[tuple[str, int], float] = {}
+    chunks: dict[tuple[str, int], RetrievedChunk] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = (chunk.upload_id, chunk.chunk_index)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            chunks.setdefault(key, chunk)
+    return [
+        replace(chunks[key], score=score)
+        for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+async def hybrid_search_business_chunks(
+        client: "AsyncQdrantClient", collection_name: str, business_id: str,
+        vector: list[float], sparse_vector: SparseVector, limit: int, candidates: int,
+        rrf_k: int, search_params: Optional["models.SearchParams"] = None,
+) -> list[RetrievedChunk]:
+    """
+    The `limit` best chunks of a business by reciprocal rank fusion of a dense
+    search for `vector` and a sparse (BM25) search for `sparse_vector`, each
+    fetching `candidates` chunks. The searches run concurrently.
+
+    Sparse search catches exact terms such as product codes that embeddings
+    blur, so fewer chunks need to be passed on for the same recall.
+    """
+    from qdrant_client import models
+
+    indices, values = sparse_vector
+    if not indices:
+        return await search_business_chunks(
+            client, collection_name, business_id, vector, limit, search_params=search_params,
+        )
+
+    dense, sparse = await asyncio.gather(
+        _query_business_chunks(
+            client, collection_name, business_id, vector, max(candidates, limit),
+            search_params=search_params,
+        ),
+        _query_business_chunks(
+            client, collection_name, business_id,
+            models.SparseVector(indices=indices, values=values), max(candidates, limit),
+            using=SPARSE_VECTOR_NAME,
+        ),
+    )
+    return reciprocal_rank_fusion([dense, sparse], rrf_k)[:limit]
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+
+from app.api.responses import ORJSONResponse, event_stream_response
+from app.core.dependencies import get_current_user
+from app.models.schemas import AskRequest, AskResponse, User
+from app.services.answer_service import ask_question, stream_answer
+
+router = APIRouter()
+
+
+@router.post("/business/{business_id}/ask", response_model=AskResponse)
+async def ask_route(
+        business_id: str, request: AskRequest, user: User = Depends(get_current_user),
+) -> AskResponse:
+    """
+    Answer a question from the business's uploaded documents, citing the
+    chunks it is based on.
+    """
+    return ORJSONResponse(await ask_question(business_id, request.question, user))
+
+
+@router.post("/business/{business_id}/ask/stream")
+async def ask_stream_route(
+        business_id: str, request: AskRequest, user: User = Depends(get_current_user),
+):
+    """
+    Stream the answer as server-sent events: a "sources" event right after
+    retrieval, "delta" events with answer text, then "done". Disconnecting
+    stops generation.
+    """
+    return event_stream_response(await stream_answer(business_id, request.question, user))
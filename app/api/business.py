@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing_extensions import Optional
 
+from app.api.pagination import (
+    collect_page, ndjson_response, page_response, parse_object_id_cursor,
+)
+from app.api.responses import ORJSONResponse
 from app.constants import UserRole
+from app.core.config import settings
 from app.core.dependencies import get_current_user
 from app.models.schemas import Business, BusinessCreate, BusinessUserMapping
 from app.services.business_service import (
@@ -14,12 +19,41 @@ router = APIRouter()
 
 @router.post("/business", response_model=Business)
 async def create_business_route(business: BusinessCreate, user=Depends(get_current_user)):
-    return await create_business(business.model_dump(exclude_unset=True), user=user)
+    created = await create_business(business.model_dump(exclude_unset=True), user=user)
+    return ORJSONResponse(created)
 
 
 @router.get("/business", response_model=list[Business])
-async def get_businesses_route(user=Depends(get_current_user)) -> list[Business]:
-    return await get_businesses(user)
+async def get_businesses_route(
+        cursor: Optional[str] = None,
+        limit: int = Query(settings.LIST_PAGE_DEFAULT_LIMIT, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+        stream: bool = False,
+        user=Depends(get_current_user),
+) -> list[Business]:
+    after = parse_object_id_cursor(cursor)
+    if stream:
+        return ndjson_response(get_businesses(user, after=after))
+    page, next_cursor = await collect_page(get_businesses(user, after=after, limit=limit), limit)
+    return page_response(page, next_cursor)
+
+
+@router.get("/business/search", response_model=list[Business])
+async def search_business_route(
+        query: str = Query(..., min_length=1, max_length=settings.BUSINESS_SEARCH_MAX_QUERY_LENGTH),
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=settings.BUSINESS_SEARCH_MAX_LIMIT),
+        stream: bool = False,
+) -> list[Business]:
+    if stream:
+        return ndjson_response(search_businesses(query, cursor=cursor))
+
+    business, next_cursor = await collect_page(
+        search_businesses(query, limit=limit, cursor=cursor), limit
+    )
+    if not business:
+        raise HTTPException(status_code=404, detail="No businesses found")
+
+    return page_response(business, next_cursor)
 
 
 @router.get("/business/{business_id}", response_model=Business)
@@ -28,16 +62,7 @@ async def get_business_route(business_id: str, user=Depends(get_current_user)) -
     business: Optional[Business] = await get_business_by_id(business_id, user)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
-    return business
-
-
-@router.get("/business/search", response_model=list[Business])
-async def search_business_route(query: str) -> list[Business]:
-    business: list[Business] = await search_businesses(query)
-    if not business:
-        raise HTTPException(status_code=404, detail="No businesses found")
-
-    return business
+    return ORJSONResponse(business)
 
 
 @router.post("/business/join/{business_id}/{role}", response_model=dict)
@@ -49,13 +74,24 @@ async def join_business_route(
 
 
 @router.get("/business/join_requests/{business_id}", response_model=list[BusinessUserMapping])
-async def get_join_requests_route(business_id: str, user=Depends(get_current_user)) -> list[
-    BusinessUserMapping]:
-    requests = await get_business_requests(business_id, user)
+async def get_join_requests_route(
+        business_id: str,
+        cursor: Optional[str] = None,
+        limit: int = Query(settings.LIST_PAGE_DEFAULT_LIMIT, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+        stream: bool = False,
+        user=Depends(get_current_user),
+) -> list[BusinessUserMapping]:
+    after = parse_object_id_cursor(cursor)
+    if stream:
+        return ndjson_response(await get_business_requests(business_id, user, after=after))
+
+    requests, next_cursor = await collect_page(
+        await get_business_requests(business_id, user, after=after, limit=limit), limit
+    )
     if not requests:
         raise HTTPException(status_code=404, detail="No join requests found")
 
-    return requests
+    return page_response(requests, next_cursor)
 
 
 @router.post("/business/join_requests/{business_id}/accept/{user_id}", response_model=dict)
@@ -1,20 +1,83 @@
-from fastapi import APIRouter
+from typing import Any, Callable, Coroutine
+
+from fastapi import APIRouter, Body, HTTPException, Request, Response
 from fastapi.params import Depends
+from fastapi.routing import APIRoute
 
+from app.core.config import settings
 from app.core.dependencies import get_current_user
-from app.models.schemas import FileUploadCreate, User
-from app.services.file_upload_service import upload_file
-from app.services.kafka_producer_service import get_kafka_producer_service
+from app.models.schemas import BulkFileUploadResponse, FileUploadCreate, User
+from app.services.file_upload_service import upload_file, upload_files
 
 router = APIRouter()
 
 
+def _body_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Request body must not exceed {max_bytes} bytes")
+
+
+class BulkUploadRequest(Request):
+    """
+    Request whose body is read with a cap of `FILE_UPLOAD_BULK_MAX_BYTES`:
+    an oversized Content-Length is rejected without reading, and a chunked
+    body stops being read as soon as it passes the cap.
+    """
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            max_bytes = settings.FILE_UPLOAD_BULK_MAX_BYTES
+            content_length = self.headers.get("content-length")
+            if content_length is not None and content_length.isdigit():
+                if int(content_length) > max_bytes:
+                    raise _body_too_large(max_bytes)
+
+            chunks = []
+            size = 0
+            async for chunk in self.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _body_too_large(max_bytes)
+                chunks.append(chunk)
+            self._body = b"".join(chunks)
+        return self._body
+
+
+class BulkUploadRoute(APIRoute):
+    """
+    Enforces the bulk upload size limit while the body is read, before
+    FastAPI parses it; a dependency would only run after parsing.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            return await handler(BulkUploadRequest(request.scope, request.receive))
+
+        return limited_handler
+
+
 @router.post("/upload/{business_id}", response_model=dict)
 async def upload_file_route(
         file_data: FileUploadCreate, business_id: str, user: User = Depends(get_current_user),
-        kafka_service=Depends(get_kafka_producer_service),
 ) -> dict:
     """
     Upload a file to the specified business.
     """
-    return await upload_file(file_data, business_id, user, kafka_service)
+    return await upload_file(file_data, business_id, user)
+
+
+async def upload_files_route(
+        business_id: str, items: list[dict[str, Any]] = Body(...),
+        user: User = Depends(get_current_user),
+) -> BulkFileUploadResponse:
+    """
+    Upload many files to the specified business, with a result per item.
+    """
+    return await upload_files(items, business_id, user)
+
+
+router.add_api_route(
+    "/upload/{business_id}/bulk", upload_files_route, methods=["POST"],
+    response_model=BulkFileUploadResponse, route_class_override=BulkUploadRoute,
+)
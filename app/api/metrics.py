@@ -0,0 +1,56 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import CONTENT_TYPE, http_request_duration, render_metrics
+
+router = APIRouter()
+
+# Route label of requests no route matched, so unknown paths can't grow the label set.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_route() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+class RequestLatencyMiddleware:
+    """
+    Records the latency of every HTTP request by method, route template and
+    status code. A streamed response counts until its last chunk is sent.
+
+    Plain ASGI rather than `BaseHTTPMiddleware`, which would buffer streamed
+    responses through an extra task.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope it was given.
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                status=str(status_code),
+            )
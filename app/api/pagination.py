@@ -0,0 +1,56 @@
+from typing import AsyncIterator, Optional, TypeVar
+
+from bson import ObjectId, errors
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.api.responses import ORJSONResponse
+
+T = TypeVar("T", bound=BaseModel)
+
+# Services yield (item, cursor) pairs, where the cursor resumes right after the item.
+CursorPage = AsyncIterator[tuple[T, str]]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def parse_object_id_cursor(cursor: Optional[str]) -> Optional[ObjectId]:
+    if cursor is None:
+        return None
+    try:
+        return ObjectId(cursor)
+    except (errors.InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def collect_page(items: CursorPage, limit: int) -> tuple[list[T], Optional[str]]:
+    """Collect a page and, when it is full, the cursor of the next one."""
+    page = []
+    next_cursor = None
+    async for item, next_cursor in items:
+        page.append(item)
+
+    if len(page) < limit:
+        next_cursor = None
+    return page, next_cursor
+
+
+def page_response(page: list[T], next_cursor: Optional[str]) -> ORJSONResponse:
+    """
+    Render a page of trusted models, pointing the client at the next page
+    through the `X-Next-Cursor` header.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None
+    return ORJSONResponse(page, headers=headers)
+
+
+def ndjson_response(items: CursorPage) -> StreamingResponse:
+    """Stream items as newline-delimited JSON while they are read from Mongo."""
+
+    async def lines() -> AsyncIterator[str]:
+        async for item, _ in items:
+            yield item.model_dump_json(by_alias=True) + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,76 @@
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+@lru_cache
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize a response body. Models and lists of one model type go straight
+    through pydantic-core's compiled serializer; anything else through orjson.
+    """
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        model = type(content[0])
+        if all(type(item) is model for item in content):
+            return _list_adapter(model).dump_json(content, by_alias=True)
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered without `jsonable_encoder`, that also accepts
+    pydantic models and ObjectIds directly.
+
+    Routes that return one of these skip FastAPI's `response_model` validation,
+    so only return models that were already validated when they were built.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def event_stream_response(events: AsyncIterator[tuple[str, Any]]) -> StreamingResponse:
+    """
+    Stream (event, data) pairs as server-sent events with JSON data. A failure
+    after the stream started is reported as an "error" event.
+
+    StreamingResponse cancels the iteration when the client disconnects, which
+    closes `events` and stops the work behind it.
+    """
+
+    async def lines() -> AsyncIterator[bytes]:
+        try:
+            async for event, data in events:
+                yield b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+        except Exception:
+            logger.exception("Event stream failed")
+            yield b'event: error\ndata: {"detail":"Internal Server Error"}\n\n'
+
+    return StreamingResponse(
+        lines(), media_type=EVENT_STREAM_MEDIA_TYPE,
+        # Keep proxies from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
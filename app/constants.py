@@ -17,6 +17,7 @@ class FileUploadStatus(str, Enum):
     PENDING = "pending"
     PROCESSING = "processing"
     PROCESSED = "processed"
+    FAILED = "failed"
 
 
 LIFETIME_OF_A_TOKEN = timedelta(days=7)
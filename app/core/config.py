@@ -5,8 +5,109 @@ class Settings(BaseSettings):
     app_name: str = "Answer Your Questions"
     DEBUG: bool = True
 
-    KAFKA_BOOTSTRAP_SERVERS: str = ["localhost:9092"]
+    KAFKA_BOOTSTRAP_SERVERS: str = "localhost:9092"
     KAFKA_CONSUMER_GROUP_ID: str = "fastapi-app-consumer_group"
+    KAFKA_CONSUMER_CONCURRENCY: int = 8
+    KAFKA_CONSUMER_BATCH_SIZE: int = 100
+    # Messages fetched but not yet handled; polling stops fetching at this many.
+    KAFKA_CONSUMER_MAX_IN_FLIGHT: int = 100
+    KAFKA_CONSUMER_POLL_TIMEOUT_MS: int = 1000
+    KAFKA_CONSUMER_MAX_POLL_RECORDS: int = 500
+    KAFKA_CONSUMER_MAX_POLL_INTERVAL_MS: int = 300_000
+    # Turn off to leave consumption to `python -m app.worker` processes.
+    KAFKA_CONSUMERS_IN_API: bool = True
+    KAFKA_CONSUMER_DRAIN_TIMEOUT_SECONDS: int = 30
+    WORKER_PROCESSES: int = 1
+    # Worker N serves Prometheus metrics on this port + N; 0 disables it.
+    WORKER_METRICS_PORT: int = 0
+
+    KAFKA_PRODUCER_LINGER_MS: int = 20
+    KAFKA_PRODUCER_MAX_BATCH_SIZE: int = 64 * 1024
+    KAFKA_PRODUCER_COMPRESSION_TYPE: str | None = "gzip"
+
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_MS: int = 1000
+    # How long a relay holds the events it is publishing before another
+    # replica may take them over; keep it above the producer's delivery timeout.
+    OUTBOX_CLAIM_SECONDS: int = 300
+
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+
+    MEMBERSHIP_CACHE_MAX_SIZE: int = 50_000
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = 30
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    LIST_PAGE_DEFAULT_LIMIT: int = 50
+    LIST_PAGE_MAX_LIMIT: int = 200
+    LIST_BATCH_SIZE: int = 100
+
+    BUSINESS_SEARCH_MAX_QUERY_LENGTH: int = 100
+    BUSINESS_SEARCH_MAX_LIMIT: int = 50
+    BUSINESS_SEARCH_MAX_CANDIDATES: int = 1000
+
+    # Checked by `python -m benchmarks.startup_budget`.
+    STARTUP_IMPORT_BUDGET_MS: int = 1500
+    STARTUP_HEALTHY_BUDGET_MS: int = 5000
+
+    # Upload URLs may only point at regular files under this directory.
+    FILE_UPLOAD_ROOT: str = "uploads"
+    FILE_UPLOAD_MAX_BYTES: int = 100 * 1024 * 1024
+    FILE_UPLOAD_BULK_MAX_ITEMS: int = 1000
+    FILE_UPLOAD_BULK_MAX_BYTES: int = 1024 * 1024
+
+    INGESTION_CHUNK_SIZE: int = 1000
+    INGESTION_CHUNK_OVERLAP: int = 200
+    INGESTION_BATCH_SIZE: int = 32
+    INGESTION_PARSE_WORKERS: int = 2
+    INGESTION_PDF_PAGES_PER_TASK: int = 16
+    INGESTION_PARSE_MAX_IN_FLIGHT: int = 4
+    # Treat an upload of a file_url the business already has as a new version of
+    # that document and only re-index the chunks that changed.
+    INGESTION_INCREMENTAL: bool = True
+    # An upload stuck in processing this long (its processor died) can be claimed again.
+    INGESTION_PROCESSING_LEASE_SECONDS: int = 30 * 60
+
+    EMBEDDING_PROVIDER: str = "openai"
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int = 1536
+    # Empty disables the local embedding cache. Every process opens a shard of
+    # its own, of up to EMBEDDING_CACHE_MAX_ENTRIES * (32 + 4 * dimensions)
+    # bytes (~617 MB at the defaults, allocated as entries are written);
+    # processes beyond EMBEDDING_CACHE_MAX_SHARDS run without a cache.
+    EMBEDDING_CACHE_DIR: str = ".cache/embeddings"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100_000
+    EMBEDDING_CACHE_MAX_SHARDS: int = 4
+    # Concurrent question embeddings are merged into one provider call.
+    QUERY_EMBEDDING_BATCH_SIZE: int = 64
+    QUERY_EMBEDDING_MAX_BATCH_DELAY_MS: float = 5.0
+
+    QDRANT_URL: str = "http://localhost:6333"
+    QDRANT_COLLECTION_NAME: str = "document_chunks"
+    # "none", "scalar" (int8) or "binary"; only applied when the collection is created.
+    QDRANT_QUANTIZATION: str = "scalar"
+    # Keep original vectors on disk; with quantization only rescoring reads them.
+    QDRANT_ON_DISK_VECTORS: bool = True
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = 2.0
+
+    INDEXING_BATCH_SIZE: int = 64
+    INDEXING_MAX_BATCH_DELAY_MS: int = 50
+    INDEXING_MAX_IN_FLIGHT_BATCHES: int = 4
+
+    # "extractive" answers with the best matching chunk instead of calling a model.
+    LLM_PROVIDER: str = "openai"
+    LLM_MODEL: str = "gpt-4o-mini"
+    LLM_MAX_TOKENS: int = 512
+    ASK_MAX_QUESTION_LENGTH: int = 1000
+    ASK_TOP_K: int = 5
+    # Hybrid retrieval: candidates fetched by each of the dense and sparse searches
+    # before reciprocal rank fusion, and the fusion's rank constant.
+    RETRIEVAL_CANDIDATES: int = 20
+    RETRIEVAL_RRF_K: int = 60
+    ANSWER_CACHE_MAX_SIZE: int = 10_000
+    ANSWER_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -3,11 +3,23 @@ from datetime import datetime
 from fastapi import HTTPException, Depends, status
 from fastapi.security import APIKeyHeader
 
-from app.db.mongo import db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.mongo import user_collection
 from app.models.schemas import User
 
 api_key_header = APIKeyHeader(name="Authorization")
 
+# token -> User, so authenticated requests don't hit Mongo every time.
+token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE, ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_cached_token(token: str | None) -> None:
+    if token:
+        token_cache.pop(token)
+
 
 async def get_current_user(authorization: str = Depends(api_key_header)) -> User:
     if not authorization or not authorization.startswith("Token "):
@@ -17,12 +29,22 @@ async def get_current_user(authorization: str = Depends(api_key_header)) -> User
         )
 
     token = authorization.split(" ")[1]
-    user = await db.users.find_one({"token": token})
+    cached_user: User | None = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
+    user = await user_collection.find_one({"token": token})
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    if user.get("token_expiry") and user.get("token_expiry") < datetime.now():
+    token_expiry = user.get("token_expiry")
+    if token_expiry and token_expiry < datetime.now():
         raise HTTPException(status_code=401, detail="Token expired")
 
-    return User(**user)
+    current_user = User(**user)
+    # Never keep a user cached past the expiry of their token.
+    ttl_seconds = (token_expiry - datetime.now()).total_seconds() if token_expiry else None
+    token_cache.set(token, current_user, ttl_seconds=ttl_seconds)
+
+    return current_user
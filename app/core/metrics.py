@@ -0,0 +1,221 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Metrics are per process: the API serves its own on `/metrics` and every
+`app.worker` process serves its own on WORKER_METRICS_PORT + its number.
+Updates take a lock, since pymongo reports commands from its own threads.
+"""
+import asyncio
+import bisect
+import math
+import threading
+from typing import Iterable, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; covers everything from a cached Mongo lookup to a large PDF.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, label_names: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> (count per bucket, the last one being +Inf; sum)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bucket] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for upper_bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.label_names, "le"), (*key, _format_value(upper_bound))
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+M = TypeVar("M", bound=_Metric)
+
+_registry: dict[str, _Metric] = {}
+
+
+def _register(metric: M) -> M:
+    if metric.name in _registry:
+        raise ValueError(f"Metric {metric.name} is already registered")
+    _registry[metric.name] = metric
+    return metric
+
+
+def render_metrics() -> str:
+    """Every registered metric, in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in _registry.values()) + "\n"
+
+
+async def _serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        # Whatever was asked for, answer with the metrics and close.
+        await reader.readuntil(b"\r\n\r\n")
+        body = render_metrics().encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            + f"Content-Type: {CONTENT_TYPE}; charset=utf-8\r\n".encode("ascii")
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+            + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0") -> asyncio.Server:
+    """Serve `render_metrics()` over HTTP for processes without the API."""
+    return await asyncio.start_server(_serve_metrics, host, port)
+
+
+http_request_duration = _register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"),
+))
+mongo_command_duration = _register(Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency by command name.",
+    ("command", "status"),
+))
+kafka_message_handling_duration = _register(Histogram(
+    "kafka_message_handling_seconds", "Time spent handling one Kafka message.",
+    ("topic", "status"),
+))
+kafka_consumer_lag = _register(Gauge(
+    "kafka_consumer_lag", "Messages between the last handled offset and the partition's end.",
+    ("topic", "partition"),
+))
+password_hash_queue_depth = _register(Gauge(
+    "password_hash_queue_depth", "Password hash and verify calls running or waiting for a thread.",
+))
+ingestion_stage_duration = _register(Histogram(
+    "ingestion_stage_duration_seconds",
+    "Time spent in an ingestion stage: parse and chunk per upload, embed and upsert per "
+    "indexing batch.",
+    ("stage",),
+))
+
+embedding_cache_lookups = _register(Counter(
+    "embedding_cache_lookups_total", "Embedding cache lookups by result (hit or miss).",
+    ("result",),
+))
+embedding_cache_evictions = _register(Counter(
+    "embedding_cache_evictions_total", "Embedding cache entries evicted to make room.",
+))
+query_embedding_batch_size = _register(Histogram(
+    "query_embedding_batch_size", "Texts per batch sent by the question embedding batcher.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+))
+query_embedding_batch_wait = _register(Histogram(
+    "query_embedding_batch_wait_seconds",
+    "Time a question embedding waited for its batch to be sent.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+))
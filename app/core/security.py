@@ -1,7 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from app.core.config import settings
+from app.core.metrics import password_hash_queue_depth
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop.
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash",
+)
+_pending_password_hashes = 0
+password_hash_queue_depth.set(_pending_password_hashes)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +24,29 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def _run_password_hash(func: Callable[..., Any], *args: Any) -> Any:
+    global _pending_password_hashes
+    if _pending_password_hashes >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent authentication requests, please retry",
+        )
+
+    _pending_password_hashes += 1
+    password_hash_queue_depth.set(_pending_password_hashes)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, func, *args)
+    finally:
+        _pending_password_hashes -= 1
+        password_hash_queue_depth.set(_pending_password_hashes)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_hash(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_hash(verify_password, plain_password, hashed_password)
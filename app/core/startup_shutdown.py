@@ -1,27 +1,79 @@
 import asyncio
+from typing import Optional
 
-from app.kafka.consumers import start_kafka_consumers
-from app.kafka.producers import kafka_producer_instance, create_kafka_producer
+from app.answering.llm import close_chat_model
+from app.core.config import settings
+from app.core.security import password_hash_executor
+from app.db.mongo import close_mongo_client, file_upload_collection
+from app.db.qdrant import close_qdrant_client
+from app.ingestion.embeddings import close_embedder
+from app.ingestion.executors import shutdown_parse_executor
+from app.ingestion.indexer import close_chunk_indexer
+from app.kafka import outbox
+from app.kafka.consumers import drain_kafka_consumers, start_kafka_consumers
+from app.kafka.producers import start_kafka_producer, stop_kafka_producer
+from app.services.kafka_producer_service import KafkaProducerService
 
 background_tasks = set()
 
+consumer_task: Optional[asyncio.Task] = None
+consumer_stop_event = asyncio.Event()
+
+
+def _start_background_task(coroutine) -> asyncio.Task:
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def close_ingestion_resources() -> None:
+    """Release what file processing holds; shared by the API and the worker."""
+    await close_chunk_indexer()
+    await close_qdrant_client()
+    close_embedder()
+    shutdown_parse_executor()
+
 
 async def startup_event():
-    global kafka_producer_instance
-    kafka_producer_instance = await create_kafka_producer()
-    await kafka_producer_instance.start()
+    global consumer_task
+    producer = await start_kafka_producer()
 
-    consumer_task = asyncio.create_task(start_kafka_consumers())
-    background_tasks.add(consumer_task)
+    outbox.outbox_relay = outbox.OutboxRelay(
+        KafkaProducerService(producer),
+        collections=[file_upload_collection],
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL_MS / 1000,
+        claim_seconds=settings.OUTBOX_CLAIM_SECONDS,
+    )
+    _start_background_task(outbox.outbox_relay.run())
 
-    consumer_task.add_done_callback(background_tasks.discard)
+    if settings.KAFKA_CONSUMERS_IN_API:
+        consumer_stop_event.clear()
+        consumer_task = _start_background_task(
+            start_kafka_consumers(stop_event=consumer_stop_event)
+        )
 
 
 async def shutdown_event():
-    if kafka_producer_instance:
-        await kafka_producer_instance.stop()
+    global consumer_task
+    if consumer_task is not None:
+        await drain_kafka_consumers(
+            consumer_task, consumer_stop_event,
+            timeout=settings.KAFKA_CONSUMER_DRAIN_TIMEOUT_SECONDS,
+        )
+        consumer_task = None
 
     for task in background_tasks:
         task.cancel()
 
     await asyncio.gather(*background_tasks, return_exceptions=True)
+    outbox.outbox_relay = None
+
+    # Stopping the producer flushes any batch still lingering.
+    await stop_kafka_producer()
+
+    await close_ingestion_resources()
+    close_chat_model()
+    close_mongo_client()
+    password_hash_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,105 @@
-from app.db.mongo import user_collection, business_user_mapping_collection
+import logging
+
+from pymongo import ASCENDING, IndexModel
+
+from app.core.config import settings
+from app.db.mongo import (
+    get_db, user_collection, business_collection, business_user_mapping_collection,
+    file_upload_collection, answer_cache_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+# Every index the services rely on, by collection. Names are explicit so the
+# declared set can be diffed against what the server has.
+INDEXES: dict[str, list[IndexModel]] = {
+    user_collection.name: [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+        IndexModel([("token", ASCENDING)], name="token_1"),
+    ],
+    business_collection.name: [
+        # Prefix search reads matches in (name, _id) order straight from the index.
+        IndexModel(
+            [("name_normalized", ASCENDING), ("_id", ASCENDING)], name="name_normalized_1__id_1",
+        ),
+        IndexModel([("name_ngrams", ASCENDING)], name="name_ngrams_1"),
+    ],
+    business_user_mapping_collection.name: [
+        IndexModel(
+            [("business_id", ASCENDING), ("user_id", ASCENDING)],
+            name="business_id_1_user_id_1", unique=True,
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("business_id", ASCENDING)],
+            name="user_id_1_business_id_1",
+        ),
+        # Pending join requests of a business, in `_id` order.
+        IndexModel(
+            [("business_id", ASCENDING), ("approved_by", ASCENDING), ("_id", ASCENDING)],
+            name="business_id_1_approved_by_1__id_1",
+        ),
+    ],
+    file_upload_collection.name: [
+        IndexModel(
+            [("content_hash", ASCENDING), ("status", ASCENDING)],
+            name="content_hash_1_status_1",
+        ),
+        IndexModel(
+            [("business_id", ASCENDING), ("status", ASCENDING)],
+            name="business_id_1_status_1",
+        ),
+        # Earlier versions of a re-uploaded file.
+        IndexModel(
+            [("business_id", ASCENDING), ("file_url", ASCENDING)],
+            name="business_id_1_file_url_1",
+        ),
+        # Only unpublished outbox events are indexed, so the index stays small.
+        IndexModel(
+            [("outbox_pending", ASCENDING), ("_id", ASCENDING)],
+            name="outbox_pending_1__id_1",
+            partialFilterExpression={"outbox_pending": True},
+        ),
+    ],
+    answer_cache_collection.name: [
+        IndexModel(
+            [("created_at", ASCENDING)], name="created_at_1",
+            expireAfterSeconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        ),
+        # Answers cached under an older corpus version of a business.
+        IndexModel(
+            [("business_id", ASCENDING), ("corpus_version", ASCENDING)],
+            name="business_id_1_corpus_version_1",
+        ),
+    ],
+}
+
+
+async def diff_indexes() -> dict[str, dict[str, list[str]]]:
+    """
+    Compare declared indexes with the server's, per collection, as
+    {"missing": [...], "undeclared": [...]} index names.
+    """
+    diff = {}
+    for collection_name, indexes in INDEXES.items():
+        existing = set(await get_db()[collection_name].index_information())
+        declared = {index.document["name"] for index in indexes}
+        diff[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared - {"_id_"}),
+        }
+    return diff
 
 
 async def create_indexes():
-    await user_collection.create_index({"email": 1}, unique=True)
-    await business_user_mapping_collection.create_index(
-        {"business_id": 1, "user_id": 1}, unique=True
-        )
+    """Build declared indexes that don't exist yet; existing ones are left alone."""
+    diff = await diff_indexes()
+    for collection_name, indexes in INDEXES.items():
+        missing = set(diff[collection_name]["missing"])
+        if missing:
+            logger.info("Creating indexes on %s: %s", collection_name, sorted(missing))
+            await get_db()[collection_name].create_indexes(
+                [index for index in indexes if index.document["name"] in missing]
+            )
+        undeclared = diff[collection_name]["undeclared"]
+        if undeclared:
+            logger.warning("Undeclared indexes on %s: %s", collection_name, undeclared)
@@ -1,13 +1,62 @@
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.db.monitoring import command_counter
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import (
+        AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase,
+    )
 
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "AnswerYourQuestions")
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[MONGO_DB_NAME]
+_mongo_client: Optional["AsyncIOMotorClient"] = None
+
+
+def get_mongo_client() -> "AsyncIOMotorClient":
+    """Shared Motor client, built on first use; the API builds it in its lifespan."""
+    global _mongo_client
+    if _mongo_client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        _mongo_client = AsyncIOMotorClient(MONGO_URI, event_listeners=[command_counter])
+    return _mongo_client
+
+
+def get_db() -> "AsyncIOMotorDatabase":
+    return get_mongo_client()[MONGO_DB_NAME]
+
+
+def close_mongo_client() -> None:
+    global _mongo_client
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
+
+
+class LazyCollection:
+    """
+    Module-level handle to a collection that resolves against the shared client
+    when used, so importing a module that holds one does not build the client.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._client: Optional["AsyncIOMotorClient"] = None
+        self._collection: Optional["AsyncIOMotorCollection"] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        client = get_mongo_client()
+        if self._client is not client:
+            self._client = client
+            self._collection = client[MONGO_DB_NAME][self.name]
+        return getattr(self._collection, attribute)
+
 
-user_collection = db.users
-business_collection = db.business
-business_user_mapping_collection = db.business_user_mapping
-file_upload_collection = db.file_uploads
+user_collection = LazyCollection("users")
+business_collection = LazyCollection("business")
+business_user_mapping_collection = LazyCollection("business_user_mapping")
+file_upload_collection = LazyCollection("file_uploads")
+chunk_embedding_collection = LazyCollection("chunk_embeddings")
+answer_cache_collection = LazyCollection("answer_cache")
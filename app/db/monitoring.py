@@ -0,0 +1,40 @@
+from collections import Counter
+
+from pymongo import monitoring
+
+from app.core.metrics import mongo_command_duration
+
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    Counts Mongo commands sent by this process, by command name. Reset it,
+    exercise an endpoint and read `total()` to see how many round trips the
+    endpoint costs.
+
+    Command latencies also go to the `mongo_command_duration_seconds` metric.
+    """
+
+    def __init__(self):
+        self.counts: Counter[str] = Counter()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.counts[event.command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, command=event.command_name, status="succeeded",
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, command=event.command_name, status="failed",
+        )
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self) -> None:
+        self.counts.clear()
+
+
+command_counter = CommandCounter()
@@ -0,0 +1,153 @@
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.core.config import settings
+from app.ingestion.sparse import SPARSE_VECTOR_NAME
+
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient, models
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+
+_qdrant_client: Optional["AsyncQdrantClient"] = None
+
+
+def get_qdrant_client() -> "AsyncQdrantClient":
+    """Shared Qdrant client. QDRANT_URL=":memory:" runs Qdrant's in-process local mode."""
+    global _qdrant_client
+    if _qdrant_client is None:
+        # qdrant_client takes about a second to import, so only pay for it on first use.
+        from qdrant_client import AsyncQdrantClient
+
+        if settings.QDRANT_URL == ":memory:":
+            _qdrant_client = AsyncQdrantClient(location=":memory:")
+        else:
+            _qdrant_client = AsyncQdrantClient(url=settings.QDRANT_URL)
+    return _qdrant_client
+
+
+@dataclass(frozen=True)
+class CollectionLayout:
+    """
+    How chunk vectors are stored. With quantization, searches run on the
+    compressed vectors kept in RAM and rescore the best candidates with the
+    originals, which `on_disk` moves out of RAM.
+    """
+    quantization: str = "none"
+    on_disk: bool = False
+    # Candidates fetched per requested result before rescoring.
+    oversampling: float = 2.0
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Unknown quantization {self.quantization!r}")
+
+    @classmethod
+    def from_settings(cls) -> "CollectionLayout":
+        return cls(
+            quantization=settings.QDRANT_QUANTIZATION,
+            on_disk=settings.QDRANT_ON_DISK_VECTORS,
+            oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+        )
+
+    def quantization_config(self) -> Optional["models.QuantizationConfig"]:
+        from qdrant_client import models
+
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=True,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
+    def search_params(self) -> Optional["models.SearchParams"]:
+        from qdrant_client import models
+
+        if self.quantization == "none":
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=True, oversampling=self.oversampling,
+            )
+        )
+
+
+def payload_indexes() -> dict[str, Any]:
+    """
+    Payload indexes of the chunk collection. `business_id` is the tenant key
+    every search filters on; `upload_id` serves copies of an upload and
+    `file_url` finds the indexed chunks of a re-uploaded document.
+    """
+    from qdrant_client import models
+
+    return {
+        "business_id": models.KeywordIndexParams(
+            type=models.KeywordIndexType.KEYWORD, is_tenant=True,
+        ),
+        "upload_id": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+        "file_url": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+    }
+
+
+async def ensure_collection(
+        client: "AsyncQdrantClient", collection_name: str, dimensions: int,
+        layout: Optional[CollectionLayout] = None,
+) -> None:
+    """
+    Create the collection with `layout` (the QDRANT_* settings by default) if
+    it is missing, and add any missing payload index.
+
+    Chunks get an unnamed dense vector and a BM25 sparse vector, which Qdrant
+    weighs by IDF at query time. The layout of an existing collection is left
+    alone; changing quantization or on-disk storage, or adding sparse vectors,
+    needs a new collection.
+    """
+    from qdrant_client import models
+
+    layout = layout or CollectionLayout.from_settings()
+    if not await client.collection_exists(collection_name):
+        await client.create_collection(
+            collection_name,
+            vectors_config=models.VectorParams(
+                size=dimensions, distance=models.Distance.COSINE, on_disk=layout.on_disk,
+            ),
+            sparse_vectors_config={
+                SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF),
+            },
+            quantization_config=layout.quantization_config(),
+        )
+
+    payload_schema = (await client.get_collection(collection_name)).payload_schema
+    for field_name, field_schema in payload_indexes().items():
+        if field_name not in payload_schema:
+            logger.info("Creating payload index %s on %s", field_name, collection_name)
+            await client.create_payload_index(
+                collection_name, field_name, field_schema=field_schema, wait=True,
+            )
+
+
+async def has_sparse_vectors(client: "AsyncQdrantClient", collection_name: str) -> bool:
+    """Whether the collection stores sparse vectors; older collections don't."""
+    collection = await client.get_collection(collection_name)
+    sparse_vectors = collection.config.params.sparse_vectors or {}
+    if SPARSE_VECTOR_NAME not in sparse_vectors:
+        logger.warning(
+            "Collection %s has no sparse vectors; retrieval is dense-only", collection_name
+        )
+        return False
+    return True
+
+
+async def close_qdrant_client() -> None:
+    global _qdrant_client
+    if _qdrant_client is not None:
+        await _qdrant_client.close()
+        _qdrant_client = None
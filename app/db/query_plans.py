@@ -0,0 +1,160 @@
+"""
+Query-plan verification for the Mongo query shapes the services issue.
+
+`python -m app.db.query_plans` builds the declared indexes, `explain()`s
+every shape and exits non-zero if any winning plan contains a COLLSCAN.
+"""
+import asyncio
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from bson import ObjectId
+
+from app.constants import FileUploadStatus
+from app.db.indexes import create_indexes
+from app.db.mongo import (
+    get_db, user_collection, business_collection, business_user_mapping_collection,
+    file_upload_collection, answer_cache_collection,
+)
+from app.kafka.outbox import claimable_outbox_query
+from app.models.schemas import User
+from app.services.business_service import (
+    build_business_with_mapping_pipeline, build_search_pipeline, build_user_businesses_pipeline,
+    encode_search_cursor, pending_requests_query,
+)
+
+
+@dataclass
+class QueryShape:
+    name: str
+    collection: str
+    filter: Optional[dict] = None
+    sort: Optional[list[tuple[str, int]]] = None
+    pipeline: Optional[list[dict]] = None
+
+
+def query_shapes() -> list[QueryShape]:
+    business_id, user_id, upload_id = ObjectId(), ObjectId(), ObjectId()
+    user = User(_id=user_id, email="user@example.com", token=None, token_expiry=None)
+    search_cursor = encode_search_cursor(1, "acme", business_id)
+
+    return [
+        # auth_service / dependencies
+        QueryShape("users by email", user_collection.name, {"email": "user@example.com"}),
+        QueryShape("users by token", user_collection.name, {"token": "0" * 36}),
+        QueryShape("users by id", user_collection.name, {"_id": user_id}),
+        # business_service / authorization_service
+        QueryShape(
+            "business with caller mapping", business_collection.name,
+            pipeline=build_business_with_mapping_pipeline(business_id, user_id),
+        ),
+        QueryShape(
+            "businesses of user", business_user_mapping_collection.name,
+            pipeline=build_user_businesses_pipeline(user, after=business_id, limit=50),
+        ),
+        QueryShape(
+            "search businesses (prefix)", business_collection.name,
+            pipeline=build_search_pipeline("ac", limit=20),
+        ),
+        QueryShape(
+            "search businesses (infix, paged)", business_collection.name,
+            pipeline=build_search_pipeline("acme corp", limit=20, cursor=search_cursor),
+        ),
+        QueryShape(
+            "businesses missing search fields", business_collection.name,
+            {"name_normalized": {"$exists": False}},
+        ),
+        QueryShape(
+            "membership", business_user_mapping_collection.name,
+            {"business_id": business_id, "user_id": user_id},
+        ),
+        QueryShape(
+            "pending join requests", business_user_mapping_collection.name,
+            pending_requests_query(business_id, after=ObjectId()), sort=[("_id", 1)],
+        ),
+        # answer_service
+        QueryShape(
+            "stale cached answers", answer_cache_collection.name,
+            {"business_id": business_id, "corpus_version": {"$lt": 2}},
+        ),
+        # file_upload_service
+        QueryShape(
+            "claim pending upload", file_upload_collection.name,
+            {
+                "_id": upload_id,
+                "$or": [
+                    {"status": FileUploadStatus.PENDING},
+                    {
+                        "status": FileUploadStatus.PROCESSING,
+                        "processing_started_at": {"$lt": datetime.now()},
+                    },
+                ],
+            },
+        ),
+        QueryShape(
+            "previous version of a file", file_upload_collection.name,
+            {
+                "business_id": business_id,
+                "file_url": "file:///tmp/policy.pdf",
+                "status": FileUploadStatus.PROCESSED,
+                "_id": {"$ne": upload_id},
+            },
+            sort=[("version", -1), ("_id", -1)],
+        ),
+        QueryShape(
+            "pending outbox events", file_upload_collection.name,
+            claimable_outbox_query(datetime.now()), sort=[("_id", 1)],
+        ),
+        QueryShape(
+            "processed upload with same content", file_upload_collection.name,
+            {
+                "content_hash": "0" * 64,
+                "status": FileUploadStatus.PROCESSED,
+                "superseded_by": None,
+                "_id": {"$ne": upload_id},
+            },
+        ),
+    ]
+
+
+def _has_collscan(explain: Any) -> bool:
+    if isinstance(explain, dict):
+        if explain.get("stage") == "COLLSCAN":
+            return True
+        return any(
+            _has_collscan(value) for key, value in explain.items() if key != "rejectedPlans"
+        )
+    if isinstance(explain, list):
+        return any(_has_collscan(value) for value in explain)
+    return False
+
+
+async def explain_shape(shape: QueryShape) -> dict:
+    if shape.pipeline is not None:
+        return await get_db().command(
+            "aggregate", shape.collection, pipeline=shape.pipeline, explain=True
+        )
+    return await get_db()[shape.collection].find(shape.filter, sort=shape.sort).explain()
+
+
+async def verify_query_plans() -> list[str]:
+    """Return the names of query shapes whose winning plan scans a collection."""
+    failures = []
+    for shape in query_shapes():
+        if _has_collscan(await explain_shape(shape)):
+            failures.append(shape.name)
+    return failures
+
+
+async def main() -> int:
+    await create_indexes()
+    failures = await verify_query_plans()
+    for name in failures:
+        print(f"COLLSCAN: {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pymongo.errors import BulkWriteError
+
+from app.ingestion.embeddings import Embedder
+from app.ingestion.parsers import check_upload_file
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def hash_file(path: Path) -> str:
+    """
+    sha256 of an upload's contents, read in blocks. The opened file itself is
+    checked with `check_upload_file`, so a path swapped for a FIFO or device
+    after it was resolved is rejected instead of blocking the reading thread.
+    """
+    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK)
+    with open(fd, "rb") as file:
+        check_upload_file(os.fstat(fd))
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def chunk_content_hash(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class DedupingEmbedder:
+    """
+    Embedder wrapper backed by a content-addressed chunk store in Mongo
+    (`_id` = hash of model + text -> vector). Only texts that were never
+    embedded before reach the wrapped embedder.
+    """
+
+    def __init__(self, embedder: Embedder, collection: "AsyncIOMotorCollection"):
+        self.embedder = embedder
+        self.collection = collection
+        self.model = embedder.model
+        self.dimensions = embedder.dimensions
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        hashes = [chunk_content_hash(self.model, text) for text in texts]
+
+        vectors: dict[str, list[float]] = {}
+        async for document in self.collection.find({"_id": {"$in": list(set(hashes))}}):
+            vectors[document["_id"]] = document["vector"]
+
+        missing = {
+            content_hash: text
+            for content_hash, text in zip(hashes, texts) if content_hash not in vectors
+        }
+        if missing:
+            new_vectors = await self.embedder.embed(list(missing.values()))
+            vectors.update(zip(missing.keys(), new_vectors))
+            try:
+                await self.collection.insert_many(
+                    [
+                        {"_id": content_hash, "model": self.model, "vector": vectors[content_hash]}
+                        for content_hash in missing
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                # Another worker stored the same chunk first; that's fine.
+                if any(
+                        error["code"] != DUPLICATE_KEY_ERROR
+                        for error in e.details.get("writeErrors", [])
+                ):
+                    raise
+
+        return [vectors[content_hash] for content_hash in hashes]
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from app.core.metrics import query_embedding_batch_size, query_embedding_batch_wait
+
+if TYPE_CHECKING:
+    from app.ingestion.embeddings import Embedder
+
+
+@dataclass
+class _PendingEmbed:
+    texts: list[str]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class BatchingEmbedder:
+    """
+    Embedder wrapper that merges concurrent `embed` calls into one call to the
+    wrapped embedder.
+
+    A call waits at most `max_delay` seconds for others to join its batch; a
+    batch is sent early once it holds `max_batch_size` texts. Each caller gets
+    back only its own vectors.
+
+    Every batch is observed in the `query_embedding_batch_size` and
+    `query_embedding_batch_wait_seconds` histograms. Counters describe the
+    batches of this instance: mean batch size is `batched_texts / batches`,
+    mean added wait is `total_wait / batched_requests`.
+    """
+
+    def __init__(self, embedder: "Embedder", max_batch_size: int, max_delay: float):
+        self.embedder = embedder
+        self.model = embedder.model
+        self.dimensions = embedder.dimensions
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_texts = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._pending: list[_PendingEmbed] = []
+        self._pending_texts = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        request = _PendingEmbed(texts, loop.create_future(), time.monotonic())
+        self._pending.append(request)
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._embed_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    def _record_batch(self, batch: list[_PendingEmbed], size: int) -> None:
+        sent_at = time.monotonic()
+        waits = [sent_at - request.enqueued_at for request in batch]
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.batched_texts += size
+        self.largest_batch = max(self.largest_batch, size)
+        self.total_wait += sum(waits)
+        self.max_wait = max(self.max_wait, *waits)
+        query_embedding_batch_size.observe(size)
+        for wait in waits:
+            query_embedding_batch_wait.observe(wait)
+
+    async def _embed_batch(self, batch: list[_PendingEmbed]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        self._record_batch(batch, len(texts))
+        try:
+            vectors = await self.embedder.embed(texts)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            # A caller that was cancelled meanwhile has a done future.
+            if not request.future.done():
+                request.future.set_result(vectors[offset:offset + len(request.texts)])
+            offset += len(request.texts)
@@ -0,0 +1,233 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import mmap
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from app.core.metrics import embedding_cache_evictions, embedding_cache_lookups
+
+if TYPE_CHECKING:
+    from app.ingestion.embeddings import Embedder
+
+logger = logging.getLogger(__name__)
+
+_FLOAT_SIZE = array("f").itemsize
+# Every slot starts with the digest of the key it holds.
+_KEY_BYTES = hashlib.sha256().digest_size
+_COMMIT_EVERY = 100
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed LRU cache of embedding vectors for a single model.
+
+    Vectors live as float32 in fixed-size slots of a memory-mapped file, so a
+    lookup only touches the bytes of that one vector. A small sqlite table maps
+    cache keys to slots and remembers recency across restarts. When all
+    `max_entries` slots are used, the least recently used entry is evicted and
+    its slot reused.
+
+    Each slot also stores the digest of its key, written last. The index is
+    only committed every few writes, so after a crash it can point a key at a
+    slot that was reused since; such entries are dropped when the cache is
+    opened again.
+
+    The files of a shard are locked for exclusive use by one process; see
+    `open_embedding_cache`. Within the process, calls may come from several
+    threads and are serialized.
+    """
+
+    def __init__(
+            self, directory: Path, model: str, dimensions: int, max_entries: int,
+            shard: int = 0,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{model.replace('/', '_')}-{dimensions}.{shard}"
+        self._lock_file = open(directory / f"{name}.lock", "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise
+
+        self._slot_bytes = _KEY_BYTES + dimensions * _FLOAT_SIZE
+        vectors_path = directory / f"{name}.slots"
+        self._vectors_file = open(vectors_path, "a+b")
+        self._vectors_file.truncate(max_entries * self._slot_bytes)
+        self._vectors = mmap.mmap(self._vectors_file.fileno(), max_entries * self._slot_bytes)
+
+        self._index = sqlite3.connect(directory / f"{name}.sqlite", check_same_thread=False)
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, slot INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._index.execute("DELETE FROM entries WHERE slot >= ?", (max_entries,))
+
+        # key -> slot, least recently used first.
+        self._slots: OrderedDict[str, int] = OrderedDict()
+        stale_keys = []
+        for key, slot in self._index.execute("SELECT key, slot FROM entries ORDER BY last_used"):
+            offset = slot * self._slot_bytes
+            if self._vectors[offset:offset + _KEY_BYTES] == bytes.fromhex(key):
+                self._slots[key] = slot
+            else:
+                stale_keys.append((key,))
+        if stale_keys:
+            logger.warning("Dropping %d stale embedding cache entries", len(stale_keys))
+            self._index.executemany("DELETE FROM entries WHERE key = ?", stale_keys)
+        self._index.commit()
+
+        used_slots = set(self._slots.values())
+        self._free_slots = [
+            slot for slot in range(max_entries - 1, -1, -1) if slot not in used_slots
+        ]
+        self._clock = len(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """The cached vectors of those `keys` that are in the cache."""
+        with self._lock:
+            vectors = {}
+            for key in keys:
+                vector = self._get(key)
+                if vector is not None:
+                    vectors[key] = vector
+        embedding_cache_lookups.inc(len(vectors), result="hit")
+        embedding_cache_lookups.inc(len(keys) - len(vectors), result="miss")
+        return vectors
+
+    def set_many(self, vectors: dict[str, list[float]]) -> None:
+        with self._lock:
+            for key, vector in vectors.items():
+                self._set(key, vector)
+
+    def _get(self, key: str) -> Optional[list[float]]:
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+
+        self._slots.move_to_end(key)
+        offset = slot * self._slot_bytes + _KEY_BYTES
+        vector = array("f")
+        vector.frombytes(self._vectors[offset:offset + self._slot_bytes - _KEY_BYTES])
+        return vector.tolist()
+
+    def _set(self, key: str, vector: list[float]) -> None:
+        if len(vector) != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions} dimensions, got {len(vector)}")
+
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                evicted_key, slot = self._slots.popitem(last=False)
+                self._index.execute("DELETE FROM entries WHERE key = ?", (evicted_key,))
+                embedding_cache_evictions.inc()
+
+        # Clear the digest first, so an interrupted write never leaves a
+        # slot that still validates for the evicted key.
+        offset = slot * self._slot_bytes
+        self._vectors[offset:offset + _KEY_BYTES] = bytes(_KEY_BYTES)
+        self._vectors[offset + _KEY_BYTES:offset + self._slot_bytes] = (
+            array("f", vector).tobytes()
+        )
+        self._vectors[offset:offset + _KEY_BYTES] = bytes.fromhex(key)
+        self._slots[key] = slot
+        self._slots.move_to_end(key)
+        self._clock += 1
+        self._index.execute(
+            "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+            (key, slot, self._clock),
+        )
+        if self._clock % _COMMIT_EVERY == 0:
+            self._index.commit()
+
+    def flush(self) -> None:
+        """Persist vectors and the current LRU order."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._vectors.flush()
+        self._index.executemany(
+            "UPDATE entries SET last_used = ? WHERE key = ?",
+            ((position, key) for position, key in enumerate(self._slots)),
+        )
+        self._index.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._vectors.close()
+            self._vectors_file.close()
+            self._index.close()
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+
+
+class CachedEmbedder:
+    """Embedder wrapper that serves repeated texts from an `EmbeddingCache`."""
+
+    def __init__(self, embedder: "Embedder", cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model = embedder.model
+        self.dimensions = embedder.dimensions
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        texts_by_key = dict(zip(keys, texts))
+        # sqlite and the mmap are file I/O, so they stay off the event loop.
+        vectors = await asyncio.to_thread(self.cache.get_many, list(texts_by_key))
+
+        missing = [key for key in texts_by_key if key not in vectors]
+        if missing:
+            new_vectors = await self.embedder.embed([texts_by_key[key] for key in missing])
+            new_vectors = dict(zip(missing, new_vectors))
+            await asyncio.to_thread(self.cache.set_many, new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+
+def open_embedding_cache(
+        directory: Path, model: str, dimensions: int, max_entries: int, max_shards: int,
+) -> Optional[EmbeddingCache]:
+    """
+    Open the first shard of the cache no other process holds, or None if all
+    `max_shards` are held.
+
+    Every API or worker process gets a shard of its own, and a restarted
+    process picks up a shard left by an earlier one, warm. Shards share no
+    entries, and each takes up to `max_entries` slots of disk.
+    """
+    for shard in range(max_shards):
+        try:
+            return EmbeddingCache(directory, model, dimensions, max_entries, shard=shard)
+        except BlockingIOError:
+            continue
+    logger.warning("All %d embedding cache shards are in use; not caching", max_shards)
+    return None
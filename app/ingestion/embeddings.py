@@ -0,0 +1,110 @@
+import hashlib
+import math
+import re
+from pathlib import Path
+from typing import Optional, Protocol
+
+from app.core.config import settings
+from app.ingestion.embedding_batcher import BatchingEmbedder
+from app.ingestion.embedding_cache import CachedEmbedder, open_embedding_cache
+
+_TOKEN = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    model: str
+    dimensions: int
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+
+class OpenAIEmbedder:
+    def __init__(self, model: str, dimensions: int):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self.dimensions = dimensions
+        self._client = AsyncOpenAI()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        response = await self._client.embeddings.create(
+            model=self.model, input=texts, dimensions=self.dimensions,
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class HashEmbedder:
+    """
+    Deterministic, dependency-free embedder that feature-hashes tokens into a
+    unit vector. Texts sharing words end up close, which is enough for tests
+    and local development without a model provider.
+    """
+
+    def __init__(self, model: str = "hash", dimensions: int = 256):
+        self.model = model
+        self.dimensions = dimensions
+
+    def _embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+_embedder: Optional[Embedder] = None
+_query_embedder: Optional[BatchingEmbedder] = None
+
+
+def get_embedder() -> Embedder:
+    """Process-wide embedder, used for both document chunks and questions."""
+    global _embedder
+    if _embedder is None:
+        if settings.EMBEDDING_PROVIDER == "hash":
+            embedder = HashEmbedder(dimensions=settings.EMBEDDING_DIMENSIONS)
+        else:
+            embedder = OpenAIEmbedder(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS)
+
+        if settings.EMBEDDING_CACHE_DIR:
+            cache = open_embedding_cache(
+                Path(settings.EMBEDDING_CACHE_DIR), embedder.model, embedder.dimensions,
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                max_shards=settings.EMBEDDING_CACHE_MAX_SHARDS,
+            )
+            if cache is not None:
+                embedder = CachedEmbedder(embedder, cache)
+        _embedder = embedder
+    return _embedder
+
+
+def get_query_embedder() -> BatchingEmbedder:
+    """The process embedder behind a batcher for embedding questions."""
+    global _query_embedder
+    if _query_embedder is None or _query_embedder.embedder is not get_embedder():
+        _query_embedder = BatchingEmbedder(
+            get_embedder(),
+            max_batch_size=settings.QUERY_EMBEDDING_BATCH_SIZE,
+            max_delay=settings.QUERY_EMBEDDING_MAX_BATCH_DELAY_MS / 1000,
+        )
+    return _query_embedder
+
+
+def close_embedder() -> None:
+    global _embedder, _query_embedder
+    if isinstance(_embedder, CachedEmbedder):
+        _embedder.cache.close()
+    _embedder = None
+    _query_embedder = None
+
+
+def set_embedder(embedder: Embedder) -> None:
+    """Swap the process-wide embedder, e.g. for a fake in tests."""
+    global _embedder
+    _embedder = embedder
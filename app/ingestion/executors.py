@@ -0,0 +1,32 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for CPU-bound document parsing, created on first use.
+    Returns None when INGESTION_PARSE_WORKERS is 0, i.e. parse in-thread.
+    """
+    global _parse_executor
+    if settings.INGESTION_PARSE_WORKERS <= 0:
+        return None
+
+    if _parse_executor is None:
+        # Forking a process that runs an event loop and thread pools is unsafe.
+        _parse_executor = ProcessPoolExecutor(
+            max_workers=settings.INGESTION_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _parse_executor
+
+
+def shutdown_parse_executor() -> None:
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
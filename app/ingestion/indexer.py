@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.core.config import settings
+from app.core.metrics import ingestion_stage_duration
+from app.db.mongo import chunk_embedding_collection
+from app.db.qdrant import ensure_collection, get_qdrant_client, has_sparse_vectors
+from app.ingestion.dedup import DedupingEmbedder
+from app.ingestion.embeddings import Embedder, get_embedder
+from app.ingestion.pipeline import DocumentChunk
+from app.ingestion.sparse import SPARSE_VECTOR_NAME, SparseVector, document_sparse_vector
+
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient
+
+
+@dataclass
+class ChunkRecord:
+    point_id: str
+    text: str
+    payload: dict[str, Any]
+    sparse_vector: SparseVector
+
+
+def chunk_point_id(upload_id: str, chunk_index: int) -> str:
+    # Stable ids make re-processing the same upload an overwrite.
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{upload_id}:{chunk_index}"))
+
+
+def chunk_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_chunk_records(
+        chunks: list[DocumentChunk], business_id: str, upload_id: str, file_url: str,
+) -> list[ChunkRecord]:
+    return [
+        ChunkRecord(
+            point_id=chunk_point_id(upload_id, chunk.index),
+            text=chunk.text,
+            payload={
+                "business_id": business_id,
+                "upload_id": upload_id,
+                "file_url": file_url,
+                "chunk_index": chunk.index,
+                "source": chunk.source,
+                "text": chunk.text,
+                "chunk_hash": chunk_text_hash(chunk.text),
+            },
+            sparse_vector=document_sparse_vector(chunk.text),
+        )
+        for chunk in chunks
+    ]
+
+
+async def copy_indexed_upload(
+        client: "AsyncQdrantClient", collection_name: str, source_upload_id: str,
+        business_id: str, upload_id: str, file_url: str, batch_size: int,
+) -> int:
+    """
+    Index an upload by re-using the vectors of an already indexed upload with
+    identical content, re-pointing the payload at the new business/upload.
+    """
+    from qdrant_client import models
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name,
+            scroll_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="upload_id", match=models.MatchValue(value=source_upload_id)
+                    )
+                ]
+            ),
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            await client.upsert(
+                collection_name,
+                points=[
+                    models.PointStruct(
+                        id=chunk_point_id(upload_id, point.payload["chunk_index"]),
+                        vector=point.vector,
+                        payload={
+                            **point.payload, "business_id": business_id,
+                            "upload_id": upload_id, "file_url": file_url,
+                        },
+                    )
+                    for point in points
+                ],
+            )
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+async def indexed_chunk_hashes(
+        client: "AsyncQdrantClient", collection_name: str, business_id: str, file_url: str,
+        previous_upload_id: Optional[str], batch_size: int,
+) -> dict[str, list[str]]:
+    """
+    Point ids of a business's indexed chunks of `file_url`, by chunk hash.
+
+    Points indexed before chunk hashes were recorded are found through
+    `previous_upload_id` and listed under "", so they never match a chunk.
+    """
+    from qdrant_client import models
+
+    same_file = [
+        models.FieldCondition(key="file_url", match=models.MatchValue(value=file_url)),
+    ]
+    if previous_upload_id is not None:
+        same_file.append(
+            models.FieldCondition(
+                key="upload_id", match=models.MatchValue(value=previous_upload_id)
+            )
+        )
+
+    point_ids: dict[str, list[str]] = {}
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name,
+            scroll_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="business_id", match=models.MatchValue(value=business_id)
+                    )
+                ],
+                should=same_file,
+            ),
+            limit=batch_size,
+            offset=offset,
+            with_payload=["chunk_hash"],
+            with_vectors=False,
+        )
+        for point in points:
+            point_ids.setdefault(point.payload.get("chunk_hash", ""), []).append(str(point.id))
+        if offset is None:
+            return point_ids
+
+
+async def reassign_chunks(
+        client: "AsyncQdrantClient", collection_name: str,
+        moves: list[tuple[str, ChunkRecord]],
+) -> None:
+    """
+    Point already indexed chunks at a new upload: each (point id, record) pair
+    gets the record's payload. Vectors are left alone, so nothing is embedded.
+    """
+    from qdrant_client import models
+
+    if not moves:
+        return
+    await client.batch_update_points(
+        collection_name,
+        update_operations=[
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={key: value for key, value in record.payload.items() if key != "text"},
+                    points=[point_id],
+                )
+            )
+            for point_id, record in moves
+        ],
+    )
+
+
+async def delete_chunks(
+        client: "AsyncQdrantClient", collection_name: str, point_ids: list[str],
+) -> None:
+    from qdrant_client import models
+
+    if point_ids:
+        await client.delete(
+            collection_name, points_selector=models.PointIdsList(points=point_ids),
+        )
+
+
+class _Submission:
+    """Tracks one `submit` call until every one of its records is upserted."""
+
+    def __init__(self, size: int):
+        self.remaining = size
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def record_done(self, count: int) -> None:
+        self.remaining -= count
+        if self.remaining <= 0 and not self.future.done():
+            self.future.set_result(None)
+
+    def fail(self, exc: BaseException) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class ChunkIndexer:
+    """
+    Embeds and upserts chunks from all concurrently processed uploads in shared
+    batches of up to `batch_size`, flushed at least every `max_batch_delay`
+    seconds.
+
+    Memory is bounded: the queue holds at most `batch_size * max_in_flight`
+    records and at most `max_in_flight` batches are being embedded/upserted.
+    When the vector store falls behind, `submit` blocks, which in turn slows
+    down the Kafka consumer.
+    """
+
+    def __init__(
+            self, embedder: Embedder, client: "AsyncQdrantClient", collection_name: str,
+            batch_size: int, max_batch_delay: float, max_in_flight: int,
+    ):
+        self.embedder = embedder
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay
+        self._queue: asyncio.Queue[tuple[ChunkRecord, _Submission]] = asyncio.Queue(
+            maxsize=batch_size * max_in_flight
+        )
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._batch_tasks: set[asyncio.Task] = set()
+        self._collector_task: Optional[asyncio.Task] = None
+        self._sparse_vectors = False
+
+    async def start(self) -> None:
+        await ensure_collection(self.client, self.collection_name, self.embedder.dimensions)
+        self._sparse_vectors = await has_sparse_vectors(self.client, self.collection_name)
+        self._collector_task = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._collector_task:
+            self._collector_task.cancel()
+            await asyncio.gather(self._collector_task, return_exceptions=True)
+            self._collector_task = None
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def submit(self, records: list[ChunkRecord]) -> asyncio.Future:
+        """
+        Queue records for indexing, waiting while the queue is full. Returns a
+        future that resolves once all of them are in the vector store.
+        """
+        submission = _Submission(len(records))
+        if not records:
+            submission.future.set_result(None)
+        for record in records:
+            await self._queue.put((record, submission))
+        return submission.future
+
+    async def _next_batch(self) -> list[tuple[ChunkRecord, _Submission]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_batch_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _collect(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            await self._in_flight.acquire()
+            task = asyncio.create_task(self._index_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    def _point_vector(self, record: ChunkRecord, dense_vector: list[float]) -> Any:
+        from qdrant_client import models
+
+        if not self._sparse_vectors:
+            return dense_vector
+        indices, values = record.sparse_vector
+        return {
+            "": dense_vector,
+            SPARSE_VECTOR_NAME: models.SparseVector(indices=indices, values=values),
+        }
+
+    async def _index_batch(self, batch: list[tuple[ChunkRecord, _Submission]]) -> None:
+        from qdrant_client import models
+
+        try:
+            start = time.perf_counter()
+            vectors = await self.embedder.embed([record.text for record, _ in batch])
+            embedded = time.perf_counter()
+            ingestion_stage_duration.observe(embedded - start, stage="embed")
+            await self.client.upsert(
+                self.collection_name,
+                points=[
+                    models.PointStruct(
+                        id=record.point_id, vector=self._point_vector(record, vector),
+                        payload=record.payload,
+                    )
+                    for (record, _), vector in zip(batch, vectors)
+                ],
+            )
+            ingestion_stage_duration.observe(time.perf_counter() - embedded, stage="upsert")
+        except Exception as e:
+            for _, submission in batch:
+                submission.fail(e)
+        else:
+            for _, submission in batch:
+                submission.record_done(1)
+        finally:
+            self._in_flight.release()
+
+
+_chunk_indexer: Optional[ChunkIndexer] = None
+_chunk_indexer_lock = asyncio.Lock()
+
+
+async def get_chunk_indexer() -> ChunkIndexer:
+    global _chunk_indexer
+    async with _chunk_indexer_lock:
+        if _chunk_indexer is not None:
+            return _chunk_indexer
+
+        chunk_indexer = ChunkIndexer(
+            embedder=DedupingEmbedder(get_embedder(), chunk_embedding_collection),
+            client=get_qdrant_client(),
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            batch_size=settings.INDEXING_BATCH_SIZE,
+            max_batch_delay=settings.INDEXING_MAX_BATCH_DELAY_MS / 1000,
+            max_in_flight=settings.INDEXING_MAX_IN_FLIGHT_BATCHES,
+        )
+        await chunk_indexer.start()
+        _chunk_indexer = chunk_indexer
+    return _chunk_indexer
+
+
+async def close_chunk_indexer() -> None:
+    global _chunk_indexer
+    if _chunk_indexer is not None:
+        await _chunk_indexer.stop()
+        _chunk_indexer = None
@@ -0,0 +1,140 @@
+import os
+import stat
+from collections import deque
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from app.constants import FileType
+from app.core.config import settings
+
+# A parsed segment is (page or paragraph number, raw text).
+Segment = tuple[int, str]
+
+
+def file_url_to_path(file_url: str) -> Path:
+    """Resolve a `file://` upload URL to a local path."""
+    parsed_url = urlparse(str(file_url))
+    if parsed_url.scheme != "file":
+        raise ValueError(f"Unsupported file URL scheme: {parsed_url.scheme}")
+    return Path(url2pathname(parsed_url.path))
+
+
+def check_upload_file(stat_result: os.stat_result) -> None:
+    """Reject anything but a regular file of at most FILE_UPLOAD_MAX_BYTES."""
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise ValueError("Upload is not a regular file")
+    if stat_result.st_size > settings.FILE_UPLOAD_MAX_BYTES:
+        raise ValueError(f"Upload is larger than {settings.FILE_UPLOAD_MAX_BYTES} bytes")
+
+
+def resolve_upload_path(file_url: str) -> Path:
+    """
+    Resolve a `file://` upload URL to a regular file under FILE_UPLOAD_ROOT.
+    Raises ValueError for anything else, including symlinks out of the root.
+    """
+    path = file_url_to_path(file_url).resolve()
+    if not path.is_relative_to(Path(settings.FILE_UPLOAD_ROOT).resolve()):
+        raise ValueError("Upload is outside the upload directory")
+    try:
+        check_upload_file(path.stat())
+    except FileNotFoundError:
+        raise ValueError("Upload does not exist")
+    except OSError:
+        raise ValueError("Upload cannot be read")
+    return path
+
+
+def iter_pdf_pages(path: Path) -> Iterator[Segment]:
+    """Yield the text of a PDF one page at a time."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=1):
+            yield page_number, page.extract_text() or ""
+            # Drop the parsed layout objects pdfplumber caches on each page.
+            page.close()
+
+
+def iter_docx_paragraphs(path: Path) -> Iterator[Segment]:
+    """Yield the text of a DOCX document one paragraph at a time."""
+    from docx import Document
+
+    document = Document(str(path))
+    for paragraph_number, paragraph in enumerate(document.paragraphs, start=1):
+        yield paragraph_number, paragraph.text
+
+
+def count_pdf_pages(path: Path) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_page_range(path: Path, start: int, end: int) -> list[Segment]:
+    """Extract pages `start`..`end` (1-based, inclusive). Runs in a worker process."""
+    import pdfplumber
+
+    segments = []
+    with pdfplumber.open(path, pages=list(range(start, end + 1))) as pdf:
+        for page in pdf.pages:
+            segments.append((page.page_number, page.extract_text() or ""))
+            page.close()
+    return segments
+
+
+def extract_docx_paragraphs(path: Path) -> list[Segment]:
+    """Extract every paragraph of a DOCX document. Runs in a worker process."""
+    return list(iter_docx_paragraphs(path))
+
+
+def iter_docx_paragraphs_parallel(path: Path, executor: Executor) -> Iterator[Segment]:
+    # python-docx loads the whole document at once, so there is nothing to split.
+    yield from executor.submit(extract_docx_paragraphs, path).result()
+
+
+def iter_pdf_pages_parallel(
+        path: Path, executor: Executor, pages_per_task: int, max_in_flight: int,
+) -> Iterator[Segment]:
+    """
+    Parse a PDF in page ranges on `executor` and yield pages in document order.
+
+    At most `max_in_flight` ranges are submitted at once, so memory stays bounded
+    by the window rather than by the size of the document.
+    """
+    page_count = count_pdf_pages(path)
+    page_ranges = (
+        (start, min(start + pages_per_task - 1, page_count))
+        for start in range(1, page_count + 1, pages_per_task)
+    )
+
+    in_flight: deque[Future] = deque()
+    try:
+        for start, end in page_ranges:
+            in_flight.append(executor.submit(extract_pdf_page_range, path, start, end))
+            if len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def parse_document(
+        path: Path, file_type: FileType, executor: Optional[Executor] = None,
+        pages_per_task: int = 16, max_in_flight: int = 4,
+) -> Iterator[Segment]:
+    if file_type == FileType.PDF:
+        if executor is None:
+            return iter_pdf_pages(path)
+        return iter_pdf_pages_parallel(path, executor, pages_per_task, max_in_flight)
+    if file_type == FileType.DOCX:
+        if executor is None:
+            return iter_docx_paragraphs(path)
+        return iter_docx_paragraphs_parallel(path, executor)
+    raise ValueError(f"Parsing is not supported for file type: {file_type.value}")
@@ -0,0 +1,159 @@
+import asyncio
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Generic, Iterable, Iterator, TypeVar
+
+from app.constants import FileType
+from app.core.config import settings
+from app.core.metrics import ingestion_stage_duration
+from app.ingestion.executors import get_parse_executor
+from app.ingestion.parsers import Segment, parse_document
+
+T = TypeVar("T")
+
+_HYPHENATED_LINE_BREAK = re.compile(r"(\w)-\n(\w)")
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_WHITESPACE = re.compile(r"\s+")
+
+# About one word in this many ends a content-defined chunk boundary.
+_BOUNDARY_WORD_EVERY = 16
+
+
+@dataclass(frozen=True)
+class DocumentChunk:
+    index: int
+    text: str
+    # Page (PDF) or paragraph (DOCX) number the chunk starts in.
+    source: int
+
+
+def clean_text(text: str) -> str:
+    text = _HYPHENATED_LINE_BREAK.sub(r"\1\2", text)
+    text = _CONTROL_CHARACTERS.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def clean_segments(segments: Iterable[Segment]) -> Iterator[Segment]:
+    for source, text in segments:
+        cleaned = clean_text(text)
+        if cleaned:
+            yield source, cleaned
+
+
+def _is_boundary_word(word: str) -> bool:
+    return zlib.crc32(word.encode("utf-8")) % _BOUNDARY_WORD_EVERY == 0
+
+
+def _split_point(buffer: str, chunk_size: int, chunk_overlap: int) -> int:
+    """
+    Where the next chunk ends: after the last boundary word in the second half
+    of the chunk, else at the last space, else at `chunk_size`.
+
+    Boundary words are picked by their content alone, so after an edit the
+    chunks that follow it line up with the previous version's again and only
+    the chunks around the edit change.
+    """
+    min_split = max(chunk_size // 2, chunk_overlap + 1)
+    last_space = buffer.rfind(" ", 0, chunk_size + 1)
+    end = last_space
+    while end > min_split:
+        start = buffer.rfind(" ", 0, end)
+        if _is_boundary_word(buffer[start + 1:end]):
+            return end
+        end = start
+    return last_space if last_space > chunk_overlap else chunk_size
+
+
+def chunk_segments(
+        segments: Iterable[Segment], chunk_size: int, chunk_overlap: int,
+) -> Iterator[DocumentChunk]:
+    """
+    Split a stream of segments into overlapping chunks of at most `chunk_size`
+    characters. Only the text of the chunk being built is held in memory.
+    """
+    buffer = ""
+    buffer_source = 0
+    has_new_text = False
+    index = 0
+
+    for source, text in segments:
+        if not buffer:
+            buffer_source = source
+        buffer = f"{buffer} {text}" if buffer else text
+        has_new_text = True
+
+        while len(buffer) > chunk_size:
+            split_at = _split_point(buffer, chunk_size, chunk_overlap)
+            yield DocumentChunk(index=index, text=buffer[:split_at].strip(), source=buffer_source)
+            index += 1
+
+            # Start the overlap on a word boundary where possible.
+            overlap_start = max(split_at - chunk_overlap, 0)
+            word_start = buffer.find(" ", overlap_start, split_at)
+            buffer = buffer[word_start + 1 if word_start != -1 else overlap_start:].strip()
+            buffer_source = source
+            has_new_text = len(buffer) > chunk_overlap
+
+    if buffer and has_new_text:
+        yield DocumentChunk(index=index, text=buffer, source=buffer_source)
+
+
+class TimedIterator(Generic[T]):
+    """Wraps an iterator and adds up the time spent producing its items."""
+
+    def __init__(self, iterator: Iterator[T]):
+        self._iterator = iterator
+        self.seconds = 0.0
+
+    def __iter__(self) -> "TimedIterator[T]":
+        return self
+
+    def __next__(self) -> T:
+        start = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def iter_document_chunks(path: Path, file_type: FileType) -> Iterator[DocumentChunk]:
+    """
+    parse -> clean -> chunk, streamed segment by segment. The time spent
+    parsing, and in cleaning and chunking, is recorded once the stream ends.
+    """
+    segments = TimedIterator(parse_document(
+        path, file_type, executor=get_parse_executor(),
+        pages_per_task=settings.INGESTION_PDF_PAGES_PER_TASK,
+        max_in_flight=settings.INGESTION_PARSE_MAX_IN_FLIGHT,
+    ))
+    chunks = TimedIterator(chunk_segments(
+        clean_segments(segments),
+        chunk_size=settings.INGESTION_CHUNK_SIZE,
+        chunk_overlap=settings.INGESTION_CHUNK_OVERLAP,
+    ))
+    try:
+        yield from chunks
+    finally:
+        ingestion_stage_duration.observe(segments.seconds, stage="parse")
+        ingestion_stage_duration.observe(chunks.seconds - segments.seconds, stage="chunk")
+
+
+def _next_batch(iterator: Iterator[T], batch_size: int) -> list[T]:
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+async def iterate_in_thread(iterator: Iterator[T], batch_size: int) -> AsyncIterator[list[T]]:
+    """Drive a blocking iterator from a worker thread, yielding it in small batches."""
+    while True:
+        batch = await asyncio.to_thread(_next_batch, iterator, batch_size)
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,60 @@
+import hashlib
+import re
+from collections import Counter
+
+# Name of the sparse vector in the chunk collection.
+SPARSE_VECTOR_NAME = "text"
+
+# BM25 term-frequency saturation and length normalization. IDF is applied by
+# Qdrant at query time (the sparse vector uses the IDF modifier).
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Roughly the token count of a full INGESTION_CHUNK_SIZE chunk.
+BM25_AVERAGE_DOCUMENT_TOKENS = 180
+
+# Words, and codes such as "AB-1234" or "POL/2023/0042" kept whole.
+_TOKEN = re.compile(r"\w+(?:[-/.:]\w+)*")
+_CODE_PART = re.compile(r"\w+")
+
+SparseVector = tuple[list[int], list[float]]
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased terms of `text`. A code is kept whole and also split into its
+    parts, so "AB-1234" matches both exact and partial queries.
+    """
+    terms = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(_CODE_PART.findall(token))
+    return terms
+
+
+def term_index(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _sparse_vector(weights: dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return indices, [weights[index] for index in indices]
+
+
+def document_sparse_vector(text: str) -> SparseVector:
+    """BM25 term weights of a chunk, as (indices, values)."""
+    terms = tokenize(text)
+    length_norm = 1 - BM25_B + BM25_B * len(terms) / BM25_AVERAGE_DOCUMENT_TOKENS
+    weights: dict[int, float] = {}
+    for term, count in Counter(terms).items():
+        index = term_index(term)
+        weights[index] = weights.get(index, 0.0) + (
+            count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+        )
+    return _sparse_vector(weights)
+
+
+def query_sparse_vector(text: str) -> SparseVector:
+    """Query terms with weight 1; Qdrant's IDF weighs them at search time."""
+    return _sparse_vector({term_index(term): 1.0 for term in tokenize(text)})
@@ -1,37 +1,293 @@
 import asyncio
 import json
-
-from aiokafka import AIOKafkaConsumer
+import logging
+import time
+from typing import TYPE_CHECKING, Iterable, Optional
 
 from app.core.config import settings
+from app.core.metrics import kafka_consumer_lag, kafka_message_handling_duration
 from app.kafka.schemas import KafkaFileUploadCreationEvent
 from app.kafka.topics import FILE_UPLOADED_TOPIC
 from app.services.file_upload_service import process_file_upload
 
+if TYPE_CHECKING:
+    from aiokafka import (
+        AIOKafkaConsumer, ConsumerRebalanceListener, ConsumerRecord, TopicPartition,
+    )
+
+logger = logging.getLogger(__name__)
+
 
-async def start_kafka_consumers():
-    consumer = AIOKafkaConsumer(
-        FILE_UPLOADED_TOPIC,
+def create_kafka_consumer() -> "AIOKafkaConsumer":
+    from aiokafka import AIOKafkaConsumer
+
+    # Subscribed in `start_kafka_consumers`, together with its rebalance listener.
+    return AIOKafkaConsumer(
         bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
         group_id=settings.KAFKA_CONSUMER_GROUP_ID,
-        auto_offset_reset="latest"
+        auto_offset_reset="latest",
+        enable_auto_commit=False,
+        max_poll_records=settings.KAFKA_CONSUMER_MAX_POLL_RECORDS,
+        max_poll_interval_ms=settings.KAFKA_CONSUMER_MAX_POLL_INTERVAL_MS,
     )
 
+
+async def handle_message(message: "ConsumerRecord") -> None:
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        decoded_value = json.loads(message.value.decode("utf-8"))
+        if message.topic == FILE_UPLOADED_TOPIC:
+            # Process the file upload event
+            event = KafkaFileUploadCreationEvent(**decoded_value)
+            await process_file_upload(event.upload_id)
+    except Exception:
+        status = "error"
+        logger.exception("Error processing message %s", message)
+    finally:
+        kafka_message_handling_duration.observe(
+            time.perf_counter() - start, topic=message.topic, status=status,
+        )
+
+
+class PartitionProgress:
+    """
+    Offsets of a partition's dispatched messages that are not handled yet.
+    Everything below the lowest of them is handled and safe to commit.
+    """
+
+    def __init__(self):
+        self.in_flight: set[int] = set()
+        self.next_offset: Optional[int] = None
+        self.committed: Optional[int] = None
+
+    def start(self, offset: int) -> None:
+        self.in_flight.add(offset)
+        self.next_offset = offset + 1
+
+    def done(self, offset: int) -> None:
+        self.in_flight.discard(offset)
+
+    def committable(self) -> Optional[int]:
+        offset = min(self.in_flight) if self.in_flight else self.next_offset
+        return offset if offset != self.committed else None
+
+
+class MessageDispatcher:
+    """
+    Handles fetched messages as they arrive instead of in batches: up to
+    `concurrency` run at once and messages with the same key run in order, so
+    one slow document only holds up its own key.
+    """
+
+    def __init__(self, concurrency: int):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._progress: dict["TopicPartition", PartitionProgress] = {}
+        # (partition, key) -> the last dispatched task for that key.
+        self._key_tails: dict[tuple["TopicPartition", bytes | None], asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def dispatch(self, topic_partition: "TopicPartition", message: "ConsumerRecord") -> None:
+        progress = self._progress.setdefault(topic_partition, PartitionProgress())
+        progress.start(message.offset)
+
+        key = (topic_partition, message.key)
+        task = asyncio.create_task(
+            self._handle(message, self._key_tails.get(key), progress)
+        )
+        self._key_tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finished(key, done))
+
+    async def _handle(
+            self, message: "ConsumerRecord", previous: Optional[asyncio.Task],
+            progress: PartitionProgress,
+    ) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._semaphore:
+            await handle_message(message)
+        # Not reached when cancelled, so the message is never committed.
+        progress.done(message.offset)
+
+    def _finished(self, key: tuple["TopicPartition", bytes | None], task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._key_tails.get(key) is task:
+            del self._key_tails[key]
+
+    async def wait_for_room(self, timeout: float) -> None:
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+    async def wait(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def committable_offsets(self) -> dict["TopicPartition", int]:
+        offsets = {}
+        for topic_partition, progress in self._progress.items():
+            offset = progress.committable()
+            if offset is not None:
+                offsets[topic_partition] = offset
+        return offsets
+
+    def mark_committed(self, offsets: dict["TopicPartition", int]) -> None:
+        for topic_partition, offset in offsets.items():
+            if topic_partition in self._progress:
+                self._progress[topic_partition].committed = offset
+
+    def forget(self, partitions: Iterable["TopicPartition"]) -> None:
+        """
+        Stop tracking revoked partitions. Their messages still in flight finish,
+        but are redelivered to the partition's new owner.
+        """
+        for topic_partition in partitions:
+            self._progress.pop(topic_partition, None)
+
+
+async def commit_handled(consumer: "AIOKafkaConsumer", dispatcher: MessageDispatcher) -> None:
+    """
+    Commit every partition up to its first message that is not handled yet.
+
+    A commit can fail when the group rebalanced underneath us, e.g. after a
+    handler outran the max poll interval. That is logged rather than raised:
+    the partition's new owner resumes from the last committed offset.
+    """
+    from aiokafka.errors import KafkaError
+
+    offsets = dispatcher.committable_offsets()
+    if not offsets:
+        return
+    try:
+        await consumer.commit(offsets)
+    except KafkaError as e:
+        logger.warning("Failed to commit Kafka offsets %s: %s", offsets, e)
+        return
+    dispatcher.mark_committed(offsets)
+    record_consumer_lag(consumer, offsets)
+
+
+def rebalance_listener(
+        consumer: "AIOKafkaConsumer", dispatcher: MessageDispatcher,
+) -> "ConsumerRebalanceListener":
+    from aiokafka import ConsumerRebalanceListener
+
+    class CommitOnRevoke(ConsumerRebalanceListener):
+        async def on_partitions_revoked(self, revoked: set["TopicPartition"]) -> None:
+            await commit_handled(consumer, dispatcher)
+            dispatcher.forget(revoked)
+
+        async def on_partitions_assigned(self, assigned: set["TopicPartition"]) -> None:
+            pass
+
+    return CommitOnRevoke()
+
+
+async def _poll_paused(consumer: "AIOKafkaConsumer") -> None:
+    """Poll without fetching anything, which keeps the consumer in its group."""
+    partitions = consumer.assignment()
+    consumer.pause(*partitions)
+    try:
+        await consumer.getmany(timeout_ms=0)
+    finally:
+        consumer.resume(*partitions)
+
+
+async def consume_batches(
+        consumer: "AIOKafkaConsumer", stop_event: asyncio.Event,
+        dispatcher: Optional[MessageDispatcher] = None,
+) -> None:
+    """
+    Poll and dispatch messages until `stop_event` is set, committing offsets as
+    messages are handled. At most KAFKA_CONSUMER_MAX_IN_FLIGHT messages are
+    fetched ahead; while that many are in flight the consumer keeps polling
+    without fetching. Dispatched messages are finished and committed before
+    returning, and cancelled if this is cancelled.
+    """
+    dispatcher = dispatcher or MessageDispatcher(settings.KAFKA_CONSUMER_CONCURRENCY)
+    poll_timeout = settings.KAFKA_CONSUMER_POLL_TIMEOUT_MS / 1000
+    try:
+        while not stop_event.is_set():
+            room = settings.KAFKA_CONSUMER_MAX_IN_FLIGHT - dispatcher.in_flight
+            if room <= 0:
+                await dispatcher.wait_for_room(poll_timeout)
+                room = settings.KAFKA_CONSUMER_MAX_IN_FLIGHT - dispatcher.in_flight
+
+            if room > 0:
+                batch = await consumer.getmany(
+                    timeout_ms=settings.KAFKA_CONSUMER_POLL_TIMEOUT_MS,
+                    max_records=min(room, settings.KAFKA_CONSUMER_BATCH_SIZE),
+                )
+                for topic_partition, messages in batch.items():
+                    for message in messages:
+                        dispatcher.dispatch(topic_partition, message)
+            else:
+                await _poll_paused(consumer)
+            await commit_handled(consumer, dispatcher)
+
+        await dispatcher.wait()
+        await commit_handled(consumer, dispatcher)
+    finally:
+        await dispatcher.cancel()
+
+
+def record_consumer_lag(
+        consumer: "AIOKafkaConsumer", offsets: dict["TopicPartition", int],
+) -> None:
+    """Record how far each partition's end is ahead of the offsets just committed."""
+    for topic_partition, offset in offsets.items():
+        highwater = consumer.highwater(topic_partition)
+        if highwater is not None:
+            kafka_consumer_lag.set(
+                max(highwater - offset, 0),
+                topic=topic_partition.topic, partition=str(topic_partition.partition),
+            )
+
+
+async def start_kafka_consumers(
+        consumer: Optional["AIOKafkaConsumer"] = None, stop_event: asyncio.Event | None = None,
+):
+    consumer = consumer or create_kafka_consumer()
+    stop_event = stop_event or asyncio.Event()
+    dispatcher = MessageDispatcher(settings.KAFKA_CONSUMER_CONCURRENCY)
+
+    consumer.subscribe(
+        [FILE_UPLOADED_TOPIC], listener=rebalance_listener(consumer, dispatcher)
+    )
     await consumer.start()
 
     try:
-        async for message in consumer:
-            try:
-                decoded_value = json.loads(message.value.decode("utf-8"))
-                if message.topic == FILE_UPLOADED_TOPIC:
-                    # Process the file upload event
-                    event = KafkaFileUploadCreationEvent(**decoded_value)
-                    await process_file_upload(event.upload_id)
-            except Exception as e:
-                print(f"Error processing message: {e}, message: {message}")
+        await consume_batches(consumer, stop_event, dispatcher)
     except asyncio.CancelledError:
-        print("Kafka consumer stopped")
-    except Exception as e:
-        print(f"Error in Kafka consumer: {e}")
+        logger.info("Kafka consumer stopped")
+    except Exception:
+        logger.exception("Error in Kafka consumer")
     finally:
         await consumer.stop()
+
+
+async def drain_kafka_consumers(
+        consumer_task: asyncio.Task, stop_event: asyncio.Event, timeout: float,
+) -> None:
+    """
+    Ask a running `start_kafka_consumers` task to stop after the messages it
+    has dispatched and wait up to `timeout` seconds for it, cancelling it
+    after that.
+
+    Cancelled messages are not committed and will be redelivered.
+    """
+    stop_event.set()
+    try:
+        await asyncio.wait_for(asyncio.shield(consumer_task), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Kafka consumer did not drain in time, cancelling")
+        consumer_task.cancel()
+        await asyncio.gather(consumer_task, return_exceptions=True)
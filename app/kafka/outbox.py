@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional
+
+from pydantic import BaseModel
+
+from app.services.kafka_producer_service import KafkaProducerService
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PENDING_FIELD = "outbox_pending"
+OUTBOX_CLAIMED_UNTIL_FIELD = "outbox.claimed_until"
+
+
+def outbox_fields(topic: str, key: str, event: BaseModel) -> dict:
+    """
+    Fields that embed a pending Kafka event in the document being inserted.
+
+    Embedding the outbox entry in the same document makes the business write and
+    the event one atomic insert, without needing multi-document transactions.
+    """
+    return {
+        "outbox": {"topic": topic, "key": key, "value": event.model_dump_json()},
+        OUTBOX_PENDING_FIELD: True,
+    }
+
+
+def claimable_outbox_query(now: datetime) -> dict:
+    """Pending events that no relay holds an unexpired claim on."""
+    return {OUTBOX_PENDING_FIELD: True, OUTBOX_CLAIMED_UNTIL_FIELD: {"$not": {"$gt": now}}}
+
+
+class OutboxRelay:
+    """
+    Publishes pending outbox events from `collections` to Kafka in bulk and
+    marks them as published once the broker has acknowledged them.
+
+    Every API replica runs a relay, so each event is claimed atomically for
+    `claim_seconds` before it is sent; a relay that dies mid-batch leaves its
+    claims to expire. Events that fail to publish are released and retried on
+    the next poll, so they survive broker outages. Delivery is at-least-once;
+    consumers must tolerate duplicates.
+    """
+
+    def __init__(
+            self, producer_service: KafkaProducerService,
+            collections: list["AsyncIOMotorCollection"], batch_size: int, poll_interval: float,
+            claim_seconds: float,
+    ):
+        self.producer_service = producer_service
+        self.collections = collections
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.claim_seconds = claim_seconds
+        self._wake_up = asyncio.Event()
+
+    def notify(self) -> None:
+        """Publish new events now instead of waiting for the next poll."""
+        self._wake_up.set()
+
+    async def _claim(self, collection: "AsyncIOMotorCollection") -> Optional[dict]:
+        now = datetime.now()
+        return await collection.find_one_and_update(
+            claimable_outbox_query(now),
+            {"$set": {OUTBOX_CLAIMED_UNTIL_FIELD: now + timedelta(seconds=self.claim_seconds)}},
+            projection={"outbox": 1}, sort=[("_id", 1)],
+        )
+
+    async def publish_pending(self, collection: "AsyncIOMotorCollection") -> int:
+        # Each claimed event is handed to the producer straight away, so
+        # claiming the rest of the batch overlaps with its delivery.
+        documents, deliveries, failed_ids = [], [], []
+        while len(documents) + len(failed_ids) < self.batch_size:
+            document = await self._claim(collection)
+            if document is None:
+                break
+            try:
+                deliveries.append(await self.producer_service.send_message(
+                    document["outbox"]["topic"], document["outbox"]["key"],
+                    document["outbox"]["value"],
+                ))
+            except Exception as exc:
+                logger.warning("Failed to publish outbox event %s: %s", document["_id"], exc)
+                failed_ids.append(document["_id"])
+                break
+            documents.append(document)
+
+        results = await asyncio.gather(*deliveries, return_exceptions=True)
+
+        published_ids = []
+        for document, result in zip(documents, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to publish outbox event %s: %s", document["_id"], result)
+                failed_ids.append(document["_id"])
+            else:
+                published_ids.append(document["_id"])
+
+        if published_ids:
+            await collection.update_many(
+                {"_id": {"$in": published_ids}},
+                {
+                    "$set": {OUTBOX_PENDING_FIELD: False, "outbox_published_at": datetime.now()},
+                    "$unset": {"outbox": ""},
+                },
+            )
+        if failed_ids:
+            await collection.update_many(
+                {"_id": {"$in": failed_ids}, OUTBOX_PENDING_FIELD: True},
+                {"$unset": {OUTBOX_CLAIMED_UNTIL_FIELD: ""}},
+            )
+        return len(published_ids)
+
+    async def run(self) -> None:
+        while True:
+            self._wake_up.clear()
+            published = 0
+            for collection in self.collections:
+                try:
+                    published += await self.publish_pending(collection)
+                except Exception:
+                    logger.exception("Outbox relay failed for %s", collection.name)
+
+            # A full batch means there is probably more waiting.
+            if published >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake_up.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+outbox_relay: Optional[OutboxRelay] = None
+
+
+def notify_outbox_relay() -> None:
+    if outbox_relay is not None:
+        outbox_relay.notify()
@@ -1,20 +1,42 @@
-from aiokafka import AIOKafkaProducer
+from typing import TYPE_CHECKING, Optional
 
 from app.core.config import settings
 
-kafka_producer_instance: AIOKafkaProducer | None = None
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaProducer
 
+kafka_producer_instance: Optional["AIOKafkaProducer"] = None
 
-async def get_kafka_producer() -> AIOKafkaProducer:
+
+async def get_kafka_producer() -> "AIOKafkaProducer":
     if kafka_producer_instance is None:
         raise Exception("Kafka producer not initialized")
     return kafka_producer_instance
 
 
-async def create_kafka_producer() -> AIOKafkaProducer:
+async def create_kafka_producer() -> "AIOKafkaProducer":
+    from aiokafka import AIOKafkaProducer
+
     producer = AIOKafkaProducer(
         bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
         client_id="fastapi-app-producer",
+        linger_ms=settings.KAFKA_PRODUCER_LINGER_MS,
+        max_batch_size=settings.KAFKA_PRODUCER_MAX_BATCH_SIZE,
+        compression_type=settings.KAFKA_PRODUCER_COMPRESSION_TYPE,
     )
 
     return producer
+
+
+async def start_kafka_producer() -> "AIOKafkaProducer":
+    global kafka_producer_instance
+    kafka_producer_instance = await create_kafka_producer()
+    await kafka_producer_instance.start()
+    return kafka_producer_instance
+
+
+async def stop_kafka_producer() -> None:
+    global kafka_producer_instance
+    if kafka_producer_instance:
+        await kafka_producer_instance.stop()
+        kafka_producer_instance = None
@@ -1,22 +1,46 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.api.answer import router as answer_router
 from app.api.business import router as business_router
 from app.api.auth import router as auth_router
+from app.api.file_upload import router as file_upload_router
+from app.api.metrics import RequestLatencyMiddleware, router as metrics_router
+from app.api.responses import ORJSONResponse
 from app.core.startup_shutdown import startup_event, shutdown_event
 from app.db.indexes import create_indexes
+from app.db.mongo import get_mongo_client
+from app.services.business_service import backfill_business_search_fields
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are built here rather than at import, so importing the app stays cheap.
+    get_mongo_client()
+    await create_indexes()
+    await backfill_business_search_fields()
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
 
 app = FastAPI(
     title="AnswerYourQuestions API",
     description="API for Question and Answer service",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
-
-app.add_event_handler("startup", create_indexes)
-app.add_event_handler("startup", startup_event)
-app.add_event_handler("shutdown", shutdown_event)
+app.add_middleware(RequestLatencyMiddleware)
 
 app.include_router(business_router, prefix="/api/v1")
 app.include_router(auth_router, prefix="/api/v1")
+app.include_router(file_upload_router, prefix="/api/v1")
+app.include_router(answer_router, prefix="/api/v1")
+app.include_router(metrics_router)
 
 
 @app.get("/health")
@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field, GetCoreSchemaHandler, EmailStr, constr, F
 from pydantic_core import core_schema
 
 from app.constants import UserRole, FileType, FileUploadStatus
+from app.core.config import settings
 
 
 class PyObjectId(ObjectId):
@@ -13,15 +14,23 @@ class PyObjectId(ObjectId):
     def __get_pydantic_core_schema__(
             cls, source_type: Any, handler: GetCoreSchemaHandler,
     ) -> core_schema.CoreSchema:
-        return core_schema.no_info_wrap_validator_function(
+        from_str = core_schema.no_info_after_validator_function(
             cls.validate,
             core_schema.str_schema()
         )
+        # ObjectIds read from Mongo pass an isinstance check without calling into
+        # Python, and JSON output is converted with str() by pydantic-core itself.
+        return core_schema.json_or_python_schema(
+            json_schema=from_str,
+            python_schema=core_schema.union_schema(
+                [core_schema.is_instance_schema(ObjectId), from_str],
+                custom_error_type="object_id", custom_error_message="Invalid ObjectId",
+            ),
+            serialization=core_schema.to_string_ser_schema(when_used="json"),
+        )
 
     @classmethod
-    def validate(cls, v: str, handler) -> ObjectId:
-        if isinstance(v, ObjectId):
-            return v
+    def validate(cls, v: str) -> ObjectId:
         if not ObjectId.is_valid(v):
             raise ValueError("Invalid ObjectId")
         return ObjectId(v)
@@ -80,6 +89,18 @@ class FileUploadCreate(BaseModel):
     file_url: FileUrl
     file_type: FileType
 
+class FileUploadResult(BaseModel):
+    """Outcome of one item of a bulk upload, in request order."""
+    index: int
+    upload_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkFileUploadResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[FileUploadResult]
+
 class FileUpload(BaseModel):
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
     file_url: FileUrl
@@ -89,6 +110,15 @@ class FileUpload(BaseModel):
     processed_at: Optional[datetime] = None
     processing_started_at: Optional[datetime] = None
     processing_error: Optional[str] = None
+    chunk_count: Optional[int] = None
+    content_hash: Optional[str] = None
+    deduplicated_from: Optional[PyObjectId] = None
+    # Incremental re-ingestion: the document version of this upload of the
+    # file_url, the version it replaced and how many of its chunks were re-used.
+    version: Optional[int] = None
+    previous_version_id: Optional[PyObjectId] = None
+    superseded_by: Optional[PyObjectId] = None
+    reused_chunk_count: Optional[int] = None
     business_id: PyObjectId
     user_id: PyObjectId
 
@@ -97,3 +127,22 @@ class FileUpload(BaseModel):
         "arbitrary_types_allowed": True,
         "json_encoders": {ObjectId: str},
     }
+
+
+class AskRequest(BaseModel):
+    question: str = Field(min_length=1, max_length=settings.ASK_MAX_QUESTION_LENGTH)
+
+
+class AnswerSource(BaseModel):
+    upload_id: str
+    chunk_index: int
+    # Page (PDF) or paragraph (DOCX) number the chunk starts in.
+    source: int
+    score: float
+
+
+class AskResponse(BaseModel):
+    answer: str
+    sources: list[AnswerSource]
+    # Whether the answer was served from the answer cache.
+    cached: bool = False
@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Optional
+
+from bson import ObjectId, errors
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from app.answering.llm import get_chat_model
+from app.answering.retrieval import (
+    RetrievedChunk, hybrid_search_business_chunks, search_business_chunks,
+)
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.mongo import answer_cache_collection, business_collection
+from app.db.qdrant import (
+    CollectionLayout, ensure_collection, get_qdrant_client, has_sparse_vectors,
+)
+from app.ingestion.embedding_cache import normalize_text
+from app.ingestion.embeddings import get_query_embedder
+from app.ingestion.sparse import query_sparse_vector
+from app.models.schemas import AnswerSource, AskResponse, User
+from app.services.authorization_service import require_access
+
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient
+
+NO_ANSWER = "I couldn't find anything about that in this business's documents."
+
+# Answer cache key -> AskResponse. Keys include the business's corpus version, so
+# entries for an outdated corpus are never served and just age out. The
+# `answer_cache` collection shares answers across processes.
+answer_cache = TTLCache(
+    max_size=settings.ANSWER_CACHE_MAX_SIZE, ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
+
+# Answer cache key -> answer being generated, so concurrent askers of the same
+# question share one model call.
+_answers_in_flight: dict[str, asyncio.Future] = {}
+
+_chunk_collection_ready = False
+_chunk_collection_sparse = False
+_chunk_collection_lock = asyncio.Lock()
+
+
+def normalize_question(question: str) -> str:
+    return normalize_text(question).casefold().rstrip("?!. ")
+
+
+def answer_cache_key(business_id: ObjectId, corpus_version: int, question: str) -> str:
+    key = f"{business_id}\0{corpus_version}\0{normalize_question(question)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+async def bump_corpus_version(business_id: ObjectId) -> None:
+    """
+    Record that a business's documents changed, which retires every answer
+    cached for it, and drop the shared copies of those answers.
+    """
+    business = await business_collection.find_one_and_update(
+        {"_id": business_id}, {"$inc": {"corpus_version": 1}},
+        projection={"corpus_version": 1}, return_document=ReturnDocument.AFTER,
+    )
+    if business:
+        await answer_cache_collection.delete_many(
+            {"business_id": business_id, "corpus_version": {"$lt": business["corpus_version"]}}
+        )
+
+
+async def _ensure_chunk_collection(client: "AsyncQdrantClient", dimensions: int) -> None:
+    """Create the chunk collection once per process and note whether it has sparse vectors."""
+    global _chunk_collection_ready, _chunk_collection_sparse
+    if _chunk_collection_ready:
+        return
+    async with _chunk_collection_lock:
+        if _chunk_collection_ready:
+            return
+        await ensure_collection(client, settings.QDRANT_COLLECTION_NAME, dimensions)
+        _chunk_collection_sparse = await has_sparse_vectors(
+            client, settings.QDRANT_COLLECTION_NAME
+        )
+        _chunk_collection_ready = True
+
+
+async def retrieve_chunks(business_id: str, question: str) -> list[RetrievedChunk]:
+    embedder = get_query_embedder()
+    [vector] = await embedder.embed([question])
+
+    client = get_qdrant_client()
+    await _ensure_chunk_collection(client, embedder.dimensions)
+
+    search_params = CollectionLayout.from_settings().search_params()
+    if not _chunk_collection_sparse:
+        return await search_business_chunks(
+            client, settings.QDRANT_COLLECTION_NAME, business_id, vector,
+            limit=settings.ASK_TOP_K, search_params=search_params,
+        )
+    return await hybrid_search_business_chunks(
+        client, settings.QDRANT_COLLECTION_NAME, business_id, vector,
+        query_sparse_vector(question), limit=settings.ASK_TOP_K,
+        candidates=settings.RETRIEVAL_CANDIDATES, rrf_k=settings.RETRIEVAL_RRF_K,
+        search_params=search_params,
+    )
+
+
+def _answer_sources(chunks: list[RetrievedChunk]) -> list[AnswerSource]:
+    return [
+        AnswerSource(
+            upload_id=chunk.upload_id, chunk_index=chunk.chunk_index,
+            source=chunk.source, score=chunk.score,
+        )
+        for chunk in chunks
+    ]
+
+
+async def generate_answer(business_id: str, question: str) -> AskResponse:
+    """Answer from the business's most relevant chunks, without any caching."""
+    chunks = await retrieve_chunks(business_id, question)
+    if not chunks:
+        return AskResponse(answer=NO_ANSWER, sources=[])
+
+    answer = await get_chat_model().answer(question, chunks)
+    return AskResponse(answer=answer, sources=_answer_sources(chunks))
+
+
+async def _resolve_answer_key(
+        business_id: str, question: str, user: User,
+) -> tuple[ObjectId, int, str]:
+    """Check access and return the business id, its corpus version and the cache key."""
+    try:
+        business_oid = ObjectId(business_id)
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid business ID")
+
+    access, business = await asyncio.gather(
+        require_access(
+            business_oid, user.id, detail="You are not authorized to access this business"
+        ),
+        business_collection.find_one({"_id": business_oid}, projection={"corpus_version": 1}),
+        return_exceptions=True,
+    )
+    if isinstance(business, BaseException):
+        raise business
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+    if isinstance(access, BaseException):
+        raise access
+
+    corpus_version = business.get("corpus_version", 0)
+    return business_oid, corpus_version, answer_cache_key(business_oid, corpus_version, question)
+
+
+async def _cached_answer(key: str) -> Optional[AskResponse]:
+    """An answer from this process: cached, or being generated by another request."""
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached.model_copy(update={"cached": True})
+
+    in_flight = _answers_in_flight.get(key)
+    if in_flight is None:
+        return None
+    try:
+        response = await asyncio.shield(in_flight)
+    except asyncio.CancelledError:
+        # The generating request went away; generate the answer ourselves.
+        if in_flight.cancelled() and not asyncio.current_task().cancelling():
+            return None
+        raise
+    return response.model_copy(update={"cached": True})
+
+
+@contextmanager
+def _registered_in_flight(key: str) -> Iterator[asyncio.Future]:
+    """Let concurrent askers of `key` wait for the answer this request generates."""
+    in_flight = asyncio.get_running_loop().create_future()
+    _answers_in_flight[key] = in_flight
+    try:
+        yield in_flight
+    except Exception as e:
+        in_flight.set_exception(e)
+        # Waiting askers re-raise it; don't warn when there are none.
+        in_flight.exception()
+        raise
+    finally:
+        _answers_in_flight.pop(key, None)
+        if not in_flight.done():
+            in_flight.cancel()
+
+
+async def _stored_answer(key: str) -> Optional[AskResponse]:
+    stored = await answer_cache_collection.find_one(
+        {"_id": key}, projection={"answer": 1, "sources": 1}
+    )
+    if not stored:
+        return None
+    response = AskResponse(answer=stored["answer"], sources=stored["sources"])
+    answer_cache.set(key, response)
+    return response.model_copy(update={"cached": True})
+
+
+async def _store_answer(
+        key: str, business_id: ObjectId, corpus_version: int, question: str,
+        response: AskResponse,
+) -> None:
+    answer_cache.set(key, response)
+    await answer_cache_collection.update_one(
+        {"_id": key},
+        {
+            "$setOnInsert": {
+                "business_id": business_id,
+                "corpus_version": corpus_version,
+                "question": normalize_question(question),
+                **response.model_dump(include={"answer", "sources"}),
+                "created_at": datetime.now(),
+            }
+        },
+        upsert=True,
+    )
+
+
+async def ask_question(business_id: str, question: str, user: User) -> AskResponse:
+    """Answer a question from a business's documents, for one of its members."""
+    business_oid, corpus_version, key = await _resolve_answer_key(business_id, question, user)
+    response = await _cached_answer(key)
+    if response is not None:
+        return response
+
+    with _registered_in_flight(key) as in_flight:
+        response = await _stored_answer(key)
+        if response is None:
+            response = await generate_answer(str(business_oid), question)
+            await _store_answer(key, business_oid, corpus_version, question, response)
+        in_flight.set_result(response)
+    return response
+
+
+async def stream_answer(
+        business_id: str, question: str, user: User,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Check access, then return the answer as (event, data) pairs: "sources"
+    first, then "delta" text pieces as the model produces them, then "done".
+    Closing the iterator early stops generation.
+    """
+    business_oid, corpus_version, key = await _resolve_answer_key(business_id, question, user)
+    return _iter_answer_events(key, business_oid, corpus_version, question)
+
+
+def _answer_events(response: AskResponse) -> Iterator[tuple[str, dict]]:
+    yield "sources", {"sources": [source.model_dump() for source in response.sources]}
+    yield "delta", {"text": response.answer}
+    yield "done", {"cached": response.cached}
+
+
+async def _iter_answer_events(
+        key: str, business_id: ObjectId, corpus_version: int, question: str,
+) -> AsyncIterator[tuple[str, dict]]:
+    response = await _cached_answer(key)
+    if response is not None:
+        for event in _answer_events(response):
+            yield event
+        return
+
+    with _registered_in_flight(key) as in_flight:
+        response = await _stored_answer(key)
+        if response is not None:
+            in_flight.set_result(response)
+            for event in _answer_events(response):
+                yield event
+            return
+
+        chunks = await retrieve_chunks(str(business_id), question)
+        sources = _answer_sources(chunks)
+        yield "sources", {"sources": [source.model_dump() for source in sources]}
+
+        if chunks:
+            deltas = []
+            async for delta in get_chat_model().stream(question, chunks):
+                deltas.append(delta)
+                yield "delta", {"text": delta}
+            answer = "".join(deltas)
+        else:
+            answer = NO_ANSWER
+            yield "delta", {"text": answer}
+
+        response = AskResponse(answer=answer, sources=sources)
+        await _store_answer(key, business_id, corpus_version, question, response)
+        in_flight.set_result(response)
+    yield "done", {"cached": False}
@@ -2,18 +2,22 @@ import uuid
 from datetime import datetime
 
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 
 from app.constants import LIFETIME_OF_A_TOKEN
-from app.core.security import hash_password, verify_password
+from app.core.dependencies import invalidate_cached_token
+from app.core.security import hash_password_async, verify_password_async
 from app.db.mongo import user_collection
 from app.models.schemas import UserCreate, User
 
 
 async def create_user(user: UserCreate) -> None:
-    if await user_collection.find_one({"email": user.email}):
+    hashed_password = await hash_password_async(user.password)
+    # `email` is uniquely indexed, so the insert itself detects existing users.
+    try:
+        await user_collection.insert_one({"email": user.email, "password": hashed_password})
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = hash_password(user.password)
-    await user_collection.insert_one({"email": user.email, "password": hashed_password})
 
 
 async def login_user(user: UserCreate) -> dict:
@@ -21,15 +25,16 @@ async def login_user(user: UserCreate) -> dict:
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    if not verify_password(user.password, db_user["password"]):
+    if not await verify_password_async(user.password, db_user["password"]):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
     token = db_user.get("token")
     token_expiry = db_user.get("token_expiry")
     if token is None or token_expiry < datetime.now():
+        invalidate_cached_token(token)
         token = str(uuid.uuid4())
         token_expiry = datetime.now() + LIFETIME_OF_A_TOKEN
-        user_collection.update_one(
+        await user_collection.update_one(
             {"email": user.email}, {"$set": {"token": token, "token_expiry": token_expiry}}
         )
 
@@ -41,3 +46,4 @@ async def logout_user(user: User):
     await user_collection.update_one(
         {"_id": user_id}, {"$set": {"token": None, "token_expiry": None}}
     )
+    invalidate_cached_token(user.token)
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.constants import UserRole
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.mongo import business_user_mapping_collection
+
+
+@dataclass(frozen=True)
+class Membership:
+    """A user's role in a business and whether their join request is approved."""
+    role: UserRole
+    approved: bool
+
+    @property
+    def is_member(self) -> bool:
+        return self.role == UserRole.CREATOR or self.approved
+
+    @property
+    def can_manage(self) -> bool:
+        return self.role == UserRole.CREATOR or (self.approved and self.role == UserRole.ADMIN)
+
+
+# Caches "no mapping" too, so repeated checks by outsiders don't reach Mongo.
+_NO_MEMBERSHIP = object()
+
+# (business_id, user_id) -> Membership
+membership_cache = TTLCache(
+    max_size=settings.MEMBERSHIP_CACHE_MAX_SIZE,
+    ttl_seconds=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_membership(business_id: ObjectId, user_id: ObjectId) -> None:
+    """Drop the cached membership; call after writing the user's mapping."""
+    membership_cache.pop((business_id, user_id))
+
+
+def cache_membership(
+        business_id: ObjectId, user_id: ObjectId, mapping: Optional[dict],
+) -> Optional[Membership]:
+    """Build a Membership from a mapping document and cache it."""
+    key = (business_id, user_id)
+    if not mapping:
+        membership_cache.set(key, _NO_MEMBERSHIP)
+        return None
+
+    membership = Membership(
+        role=UserRole(mapping["role"]), approved=mapping.get("approved_by") is not None,
+    )
+    membership_cache.set(key, membership)
+    return membership
+
+
+async def get_membership(business_id: ObjectId, user_id: ObjectId) -> Optional[Membership]:
+    """Resolve a user's mapping to a business, any state, or None if there is none."""
+    key = (business_id, user_id)
+    cached = membership_cache.get(key)
+    if cached is not None:
+        return None if cached is _NO_MEMBERSHIP else cached
+
+    mapping = await business_user_mapping_collection.find_one(
+        {"business_id": business_id, "user_id": user_id},
+        projection={"role": 1, "approved_by": 1},
+    )
+    return cache_membership(business_id, user_id, mapping)
+
+
+async def has_access(business_id: ObjectId, user_id: ObjectId) -> bool:
+    membership = await get_membership(business_id, user_id)
+    return membership is not None and membership.is_member
+
+
+async def can_manage(business_id: ObjectId, user_id: ObjectId) -> bool:
+    membership = await get_membership(business_id, user_id)
+    return membership is not None and membership.can_manage
+
+
+async def require_access(business_id: ObjectId, user_id: ObjectId, detail: str) -> None:
+    if not await has_access(business_id, user_id):
+        raise HTTPException(status_code=403, detail=detail)
@@ -1,13 +1,24 @@
+import asyncio
+import base64
+import binascii
+import json
 import logging
+import re
+import unicodedata
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Optional
 
 from bson import ObjectId, errors
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 
 from app.constants import UserRole
+from app.core.config import settings
 from app.db.mongo import business_collection, business_user_mapping_collection
 from app.models.schemas import Business, User, BusinessUserMapping
+from app.services.authorization_service import (
+    cache_membership, can_manage, invalidate_membership,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,15 +32,61 @@ async def create_business_user_object(business_id: ObjectId, user_id: ObjectId)
         "joined_at": datetime.now(),
     }
     await business_user_mapping_collection.insert_one(business_user_mapping)
+    invalidate_membership(business_id, user_id)
+
+
+NGRAM_SIZE = 3
+
+
+def normalize_business_name(name: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def business_name_ngrams(normalized_name: str) -> list[str]:
+    return sorted(
+        {
+            normalized_name[i:i + NGRAM_SIZE]
+            for i in range(len(normalized_name) - NGRAM_SIZE + 1)
+        }
+    )
+
+
+def business_search_fields(name: str) -> dict:
+    """Derived fields that back the indexed business search."""
+    normalized_name = normalize_business_name(name)
+    return {
+        "name_normalized": normalized_name,
+        "name_ngrams": business_name_ngrams(normalized_name),
+    }
+
+
+async def backfill_business_search_fields() -> None:
+    """Populate search fields on businesses created before they existed."""
+    cursor = business_collection.find(
+        {"name_normalized": {"$exists": False}}, projection={"name": 1}
+    )
+    async for business in cursor:
+        await business_collection.update_one(
+            {"_id": business["_id"]}, {"$set": business_search_fields(business["name"])}
+        )
 
 
 async def create_business(business_data: dict, user: User) -> Business:
     """Create a new business and link it to the creator user."""
-    result = await business_collection.insert_one(business_data)
-    business_id = result.inserted_id
-
-    # Create the business user mapping in parallel
-    await create_business_user_object(business_id=business_id, user_id=user.id)
+    business_id = ObjectId()
+    await business_collection.insert_one(
+        {"_id": business_id, **business_data, **business_search_fields(business_data["name"])}
+    )
+    # Written after the business, so a mapping never points at a missing one.
+    # A business left without its creator is removed again.
+    try:
+        await create_business_user_object(business_id=business_id, user_id=user.id)
+    except BaseException:
+        await asyncio.shield(business_collection.delete_one({"_id": business_id}))
+        raise
 
     # Format and return the business object
     business = {"_id": str(business_id), **business_data}
@@ -47,6 +104,27 @@ def get_valid_business_for_user_kwargs(user: User) -> dict:
     }
 
 
+def build_business_with_mapping_pipeline(business_id: ObjectId, user_id: ObjectId) -> list[dict]:
+    """Fetch a business and the user's mapping to it in one round trip."""
+    pipeline = [
+        {"$match": {"_id": business_id}},
+        {
+            "$lookup": {
+                "from": business_user_mapping_collection.name,
+                "localField": "_id",
+                "foreignField": "business_id",
+                "pipeline": [
+                    {"$match": {"user_id": user_id}},
+                    {"$project": {"role": 1, "approved_by": 1}},
+                ],
+                "as": "mappings",
+            }
+        },
+        {"$project": {"name": 1, "mappings": 1}},
+    ]
+    return pipeline
+
+
 async def get_business_by_id(business_id: str, user: User) -> Optional[Business]:
     """Get a business by ID if the user has access to it."""
     # Validate business_id
@@ -55,17 +133,15 @@ async def get_business_by_id(business_id: str, user: User) -> Optional[Business]
     except errors.InvalidId:
         return None
 
-    business = await business_collection.find_one({"_id": ObjectId(business_id)})
-    if not business:
+    pipeline = build_business_with_mapping_pipeline(business_id, user.id)
+    businesses = await business_collection.aggregate(pipeline).to_list(length=1)
+    if not businesses:
         return None
 
-    mapping_obj = {
-        "business_id": business_id,
-        **get_valid_business_for_user_kwargs(user),
-    }
-
-    business_user_mapping = await business_user_mapping_collection.find_one(mapping_obj)
-    if not business_user_mapping:
+    business = businesses[0]
+    mappings = business.pop("mappings")
+    membership = cache_membership(business_id, user.id, mappings[0] if mappings else None)
+    if not membership or not membership.is_member:
         raise HTTPException(
             status_code=403,
             detail="You are not authorized to access this business"
@@ -74,30 +150,159 @@ async def get_business_by_id(business_id: str, user: User) -> Optional[Business]
     return Business(**business)
 
 
-async def get_businesses(user: User) -> List[Business]:
-    """Get all businesses that the user has access to."""
-    # Get all business mappings for this user
+def build_user_businesses_pipeline(
+        user: User, after: Optional[ObjectId], limit: Optional[int],
+) -> list[dict]:
+    """Page over the user's mappings and join in the businesses in one pipeline."""
     mapping_query = get_valid_business_for_user_kwargs(user)
-    business_user_mappings = await business_user_mapping_collection.find(mapping_query).to_list(length=None)
+    if after is not None:
+        mapping_query["business_id"] = {"$gt": after}
+
+    pipeline = [
+        {"$match": mapping_query},
+        {"$sort": {"business_id": 1}},
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline += [
+        {
+            "$lookup": {
+                "from": business_collection.name,
+                "localField": "business_id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"name": 1}}],
+                "as": "business",
+            }
+        },
+        {"$unwind": "$business"},
+        {"$replaceRoot": {"newRoot": "$business"}},
+    ]
+    return pipeline
+
+
+async def get_businesses(
+        user: User, after: Optional[ObjectId] = None, limit: Optional[int] = None,
+) -> AsyncIterator[tuple[Business, str]]:
+    """Get the businesses that the user has access to, in `_id` order after `after`."""
+    pipeline = build_user_businesses_pipeline(user, after, limit)
+    results = business_user_mapping_collection.aggregate(
+        pipeline, batchSize=settings.LIST_BATCH_SIZE
+    )
+    async for business in results:
+        yield Business(**business), str(business["_id"])
 
-    if not business_user_mappings:
-        return []
 
-    # Extract business IDs and fetch businesses
-    business_ids = [mapping["business_id"] for mapping in business_user_mappings]
-    businesses_query = {"_id": {"$in": business_ids}}
-    businesses = await business_collection.find(businesses_query).to_list(length=None)
+def encode_search_cursor(rank: int, normalized_name: str, business_id: ObjectId) -> str:
+    payload = json.dumps([rank, normalized_name, str(business_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
 
-    # Convert to Business objects
-    return [Business(**business) for business in businesses]
 
+def decode_search_cursor(cursor: str) -> tuple[int, str, ObjectId]:
+    try:
+        rank, normalized_name, business_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return int(rank), str(normalized_name), ObjectId(business_id)
+    except (binascii.Error, ValueError, TypeError, errors.InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-async def search_businesses(query: str) -> List[Business]:
-    """Search for businesses by name using case-insensitive regex."""
-    search_query = {"name": {"$regex": query, "$options": "i"}}
-    businesses = await business_collection.find(search_query).to_list(length=None)
 
-    return [Business(**business) for business in businesses]
+def _after_name_and_id(normalized_name: str, business_id: ObjectId) -> dict:
+    return {
+        "$or": [
+            {"name_normalized": {"$gt": normalized_name}},
+            {"name_normalized": normalized_name, "_id": {"$gt": business_id}},
+        ]
+    }
+
+
+def build_search_pipeline(
+        query: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+) -> list[dict]:
+    """
+    Exact matches rank first, then prefix matches, then infix matches, each in
+    (name, _id) order. Returns an empty pipeline for a blank query.
+
+    Prefix matches (ranks 0 and 1, which name order already keeps apart) are
+    read in order from the `name_normalized_1__id_1` index. Infix matches come
+    from the `name_ngrams` index. Each branch resumes after `cursor` and is cut
+    to the page size before the two are merged. The first page of the union
+    is always within both cuts, so pages neither skip nor repeat results.
+    """
+    normalized_query = normalize_business_name(query)
+    if not normalized_query:
+        return []
+
+    branch_limit = limit if limit is not None else settings.BUSINESS_SEARCH_MAX_CANDIDATES
+    after_rank, after_name, after_id = (
+        decode_search_cursor(cursor) if cursor is not None else (None, None, None)
+    )
+
+    escaped_query = re.escape(normalized_query)
+    branches = []
+    if after_rank is None or after_rank < 2:
+        prefix_match: dict = {"name_normalized": {"$regex": f"^{escaped_query}"}}
+        if after_rank is not None:
+            prefix_match = {"$and": [prefix_match, _after_name_and_id(after_name, after_id)]}
+        branches.append(
+            [
+                {"$match": prefix_match},
+                {"$sort": {"name_normalized": 1, "_id": 1}},
+                {"$limit": branch_limit},
+                {
+                    "$addFields": {
+                        "_rank": {"$cond": [{"$eq": ["$name_normalized", normalized_query]}, 0, 1]}
+                    }
+                },
+            ]
+        )
+
+    query_ngrams = business_name_ngrams(normalized_query)
+    if query_ngrams:
+        infix_match: dict = {
+            "name_ngrams": {"$all": query_ngrams},
+            # n-grams can match out of order, so confirm the substring.
+            "name_normalized": {"$regex": escaped_query, "$not": re.compile(f"^{escaped_query}")},
+        }
+        if after_rank == 2:
+            infix_match = {"$and": [infix_match, _after_name_and_id(after_name, after_id)]}
+        branches.append(
+            [
+                {"$match": infix_match},
+                {"$sort": {"name_normalized": 1, "_id": 1}},
+                {"$limit": branch_limit},
+                {"$addFields": {"_rank": 2}},
+            ]
+        )
+
+    if not branches:
+        return []
+    pipeline = branches[0] + [
+        {"$unionWith": {"coll": business_collection.name, "pipeline": branch}}
+        for branch in branches[1:]
+    ]
+    pipeline.append({"$sort": {"_rank": 1, "name_normalized": 1, "_id": 1}})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": {"name": 1, "name_normalized": 1, "_rank": 1}})
+    return pipeline
+
+
+def search_businesses(
+        query: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+) -> AsyncIterator[tuple[Business, str]]:
+    """Search businesses by name, ranked, resuming after `cursor`."""
+    return _iter_search_results(build_search_pipeline(query, limit, cursor))
+
+
+async def _iter_search_results(pipeline: list[dict]) -> AsyncIterator[tuple[Business, str]]:
+    if not pipeline:
+        return
+
+    results = business_collection.aggregate(pipeline, batchSize=settings.LIST_BATCH_SIZE)
+    async for business in results:
+        next_cursor = encode_search_cursor(
+            business["_rank"], business["name_normalized"], business["_id"]
+        )
+        yield Business(**business), next_cursor
 
 
 async def join_business_request(business_id: str, user: User, role: UserRole) -> None:
@@ -108,70 +313,80 @@ async def join_business_request(business_id: str, user: User, role: UserRole) ->
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid business ID")
 
-    # Check if user is already a member or has a pending request
-    existing_mapping = await business_user_mapping_collection.find_one(
-        {"business_id": object_id, "user_id": user.id}
-    )
-
-    if existing_mapping:
-        raise HTTPException(
-            status_code=400,
-            detail="Already a member of this business or request already raised"
-        )
-
-    # Create the join request
+    # Create the join request; the unique (business_id, user_id) index rejects
+    # users that are already members or have a pending request.
     business_user_mapping = {
         "business_id": object_id,
         "user_id": user.id,
         "role": role,
         "joined_at": datetime.now(),
     }
-    await business_user_mapping_collection.insert_one(business_user_mapping)
+    try:
+        await business_user_mapping_collection.insert_one(business_user_mapping)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="Already a member of this business or request already raised"
+        )
+    invalidate_membership(object_id, user.id)
+
+
+async def _require_manager(business_id: ObjectId, user: User) -> None:
+    """Ensure the user is the creator or an approved admin of an existing business."""
+    if await can_manage(business_id, user.id):
+        return
+
+    # Only look the business up on the failure path, to tell 404 from 403.
+    if not await business_collection.find_one({"_id": business_id}, projection={"_id": 1}):
+        raise HTTPException(status_code=404, detail="Business not found")
+    raise HTTPException(
+        status_code=403,
+        detail="You are not authorized to approve business requests"
+    )
 
 
-async def get_business_requests(business_id: str, user: User) -> List[BusinessUserMapping]:
-    """Get all pending join requests for a business."""
+async def get_business_requests(
+        business_id: str, user: User, after: Optional[ObjectId] = None,
+        limit: Optional[int] = None,
+) -> AsyncIterator[tuple[BusinessUserMapping, str]]:
+    """
+    Check the user may review join requests for a business, then return its
+    pending requests in `_id` order after `after`.
+    """
     # Validate business_id
     try:
         object_id = ObjectId(business_id)
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid business ID")
 
-    # Check if business exists
-    business = await business_collection.find_one({"_id": object_id})
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    await _require_manager(object_id, user)
 
-    # Check if user has permission to view requests
-    permission_query = {
-        "business_id": object_id,
-        "user_id": user.id,
-        "$or": [
-            {"role": UserRole.CREATOR},
-            {"approved_by": {"$exists": True, "$ne": None}, "role": UserRole.ADMIN},
-        ],
-    }
+    return _iter_business_requests(object_id, after, limit)
 
-    has_permission = await business_user_mapping_collection.find_one(permission_query)
-    if not has_permission:
-        raise HTTPException(
-            status_code=403,
-            detail="You are not authorized to approve business requests"
-        )
 
-    # Get all pending requests
+def pending_requests_query(business_id: ObjectId, after: Optional[ObjectId]) -> dict:
     requests_query = {
-        "business_id": object_id,
+        "business_id": business_id,
         "role": {"$ne": UserRole.CREATOR},
-        "$or": [
-            {"approved_by": None},
-            {"approved_by": {"$exists": False}}
-        ],
+        # Matches both a null and a missing `approved_by`.
+        "approved_by": None,
     }
+    if after is not None:
+        requests_query["_id"] = {"$gt": after}
+    return requests_query
+
 
-    requests = await business_user_mapping_collection.find(requests_query).to_list(length=None)
+async def _iter_business_requests(
+        business_id: ObjectId, after: Optional[ObjectId], limit: Optional[int],
+) -> AsyncIterator[tuple[BusinessUserMapping, str]]:
+    requests_query = pending_requests_query(business_id, after)
+    cursor = business_user_mapping_collection.find(requests_query).sort("_id", 1)
+    cursor = cursor.batch_size(settings.LIST_BATCH_SIZE)
+    if limit is not None:
+        cursor = cursor.limit(limit)
 
-    return [BusinessUserMapping(**request) for request in requests]
+    async for request in cursor:
+        yield BusinessUserMapping(**request), str(request["_id"])
 
 
 async def approve_business_request(business_id: str, user_id: str, current_user: User) -> None:
@@ -183,30 +398,11 @@ async def approve_business_request(business_id: str, user_id: str, current_user:
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid business ID or user ID")
 
-    # Verify business exists
-    business = await business_collection.find_one({"_id": business_oid})
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-
-    # Check if current user has permission to approve requests
-    permission_query = {
-        "business_id": business_oid,
-        "user_id": current_user.id,
-        "$or": [
-            {"role": UserRole.CREATOR},
-            {"approved_by": {"$exists": True, "$ne": None}, "role": UserRole.ADMIN},
-        ],
-    }
-
-    has_permission = await business_user_mapping_collection.find_one(permission_query)
-    if not has_permission:
-        raise HTTPException(
-            status_code=403,
-            detail="You are not authorized to approve business requests"
-        )
+    await _require_manager(business_oid, current_user)
 
     # Approve the request
     await business_user_mapping_collection.update_one(
         {"business_id": business_oid, "user_id": user_oid},
         {"$set": {"approved_by": current_user.id}}
     )
+    invalidate_membership(business_oid, user_oid)
@@ -1,38 +1,378 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+from bson import ObjectId, errors
 from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 
-from app.db.mongo import business_user_mapping_collection, file_upload_collection
-from app.models.schemas import FileUploadCreate, User
+from app.constants import FileUploadStatus
+from app.core.config import settings
+from app.db.mongo import file_upload_collection
+from app.ingestion.dedup import hash_file
+from app.ingestion.indexer import (
+    ChunkIndexer, build_chunk_records, copy_indexed_upload, delete_chunks, get_chunk_indexer,
+    indexed_chunk_hashes, reassign_chunks,
+)
+from app.ingestion.parsers import resolve_upload_path
+from app.ingestion.pipeline import iter_document_chunks, iterate_in_thread
+from app.kafka.outbox import notify_outbox_relay, outbox_fields
+from app.kafka.schemas import KafkaFileUploadCreationEvent
+from app.kafka.topics import FILE_UPLOADED_TOPIC
+from app.models.schemas import (
+    BulkFileUploadResponse, FileUpload, FileUploadCreate, FileUploadResult, User,
+)
+from app.services.answer_service import bump_corpus_version
+from app.services.authorization_service import require_access
 
+logger = logging.getLogger(__name__)
 
-async def upload_file(
-        file_data: FileUploadCreate, business_id: str, user: User, kafka_service,
-) -> dict:
+
+async def _require_upload_access(business_id: str, user: User) -> ObjectId:
+    try:
+        business_oid = ObjectId(business_id)
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid business ID")
+
+    await require_access(
+        business_oid, user.id, detail="You are not authorized to upload files to this business"
+    )
+    return business_oid
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+        for error in exc.errors(include_url=False)
+    )
+
+
+def _upload_path_error(file_data: FileUploadCreate) -> Optional[str]:
+    """Why the upload's file can't be ingested, or None. Touches the filesystem."""
+    try:
+        resolve_upload_path(str(file_data.file_url))
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+async def upload_file(file_data: FileUploadCreate, business_id: str, user: User) -> dict:
     """
     Upload a file to the specified business.
     """
-    business_user_mapping = business_user_mapping_collection.find_one(
-        {
-            "business_id": business_id, "user_id": user.id,
-            "$or": [{"role": "CREATOR"}, {"approved_by": {"$exists": True, "$ne": None}}],
-        }
+    business_oid = await _require_upload_access(business_id, user)
+    path_error = await asyncio.to_thread(_upload_path_error, file_data)
+    if path_error:
+        raise HTTPException(status_code=400, detail=path_error)
+
+    # The upload and its Kafka event are written in a single insert; the outbox
+    # relay publishes the event.
+    await file_upload_collection.insert_one(
+        build_file_upload_document(file_data, business_oid, user.id)
     )
+    notify_outbox_relay()
+
+    return {
+        "message": "File uploaded successfully",
+    }
 
-    if not business_user_mapping:
+
+async def upload_files(
+        items: list[dict[str, Any]], business_id: str, user: User,
+) -> BulkFileUploadResponse:
+    """
+    Upload many files to the specified business in one request.
+
+    The membership check runs once and every valid item is written with a
+    single unordered `insert_many`. Their events go out through the outbox in
+    one batch. Invalid or failed items are reported in `results` instead of
+    failing the whole request.
+    """
+    if len(items) > settings.FILE_UPLOAD_BULK_MAX_ITEMS:
         raise HTTPException(
-            status_code=403,
-            detail="You are not authorized to upload files to this business"
+            status_code=413,
+            detail=f"At most {settings.FILE_UPLOAD_BULK_MAX_ITEMS} files can be uploaded at once",
         )
 
-    uploaded_file = file_upload_collection.insert_one(
-        {"business_id": business_id, "user_id": user.id, **file_data.model_dump()}
+    business_oid = await _require_upload_access(business_id, user)
+
+    results: dict[int, FileUploadResult] = {}
+    valid_items = []
+    for index, item in enumerate(items):
+        try:
+            valid_items.append((index, FileUploadCreate.model_validate(item)))
+        except ValidationError as exc:
+            results[index] = FileUploadResult(index=index, error=_format_validation_error(exc))
+
+    # One thread hop for all the file checks rather than one per item.
+    path_errors = await asyncio.to_thread(
+        lambda: [_upload_path_error(file_data) for _, file_data in valid_items]
+    )
+    documents = []
+    for (index, file_data), path_error in zip(valid_items, path_errors):
+        if path_error:
+            results[index] = FileUploadResult(index=index, error=f"file_url: {path_error}")
+            continue
+        document = build_file_upload_document(file_data, business_oid, user.id)
+        results[index] = FileUploadResult(index=index, upload_id=str(document["_id"]))
+        documents.append((index, document))
+
+    if documents:
+        try:
+            await file_upload_collection.insert_many(
+                [document for _, document in documents], ordered=False
+            )
+        except BulkWriteError as exc:
+            # Write error indexes refer to positions in `documents`.
+            for error in exc.details.get("writeErrors", []):
+                index = documents[error["index"]][0]
+                results[index] = FileUploadResult(index=index, error=error["errmsg"])
+        notify_outbox_relay()
+
+    ordered_results = [results[index] for index in range(len(items))]
+    rejected = sum(result.error is not None for result in ordered_results)
+    return BulkFileUploadResponse(
+        accepted=len(ordered_results) - rejected, rejected=rejected, results=ordered_results,
     )
 
-    kafka_service.process_file_upload(uploaded_file.inserted_id)
 
+def build_file_upload_document(
+        file_data: FileUploadCreate, business_id: ObjectId, user_id: ObjectId,
+) -> dict:
+    upload_id = ObjectId()
+    file_upload = FileUpload(
+        business_id=business_id, user_id=user_id, **file_data.model_dump()
+    ).model_dump(exclude={"id"})
+    file_upload["file_url"] = str(file_upload["file_url"])
+
+    event = KafkaFileUploadCreationEvent(
+        upload_id=str(upload_id), source_service="file_upload_service"
+    )
     return {
-        "message": "File uploaded successfully",
+        "_id": upload_id,
+        **file_upload,
+        **outbox_fields(
+            FILE_UPLOADED_TOPIC, file_upload_event_key(business_id, file_upload["file_url"]),
+            event,
+        ),
     }
 
 
+def file_upload_event_key(business_id: ObjectId, file_url: str) -> str:
+    """
+    Kafka key of an upload's event. Versions of the same file to the same
+    business share a key, so they are processed one at a time and in order
+    rather than diffing against each other's half-indexed chunks.
+    """
+    url_hash = hashlib.sha256(file_url.encode("utf-8")).hexdigest()[:32]
+    return f"file_upload_{business_id}_{url_hash}"
+
+
+async def _finish_file_upload(upload_id: ObjectId, **fields) -> None:
+    await file_upload_collection.update_one(
+        {"_id": upload_id}, {"$set": {"processed_at": datetime.now(), **fields}}
+    )
+
+
 async def process_file_upload(upload_id: str) -> None:
-    pass
+    """Parse, chunk and index an uploaded file, recording progress on the upload."""
+    try:
+        upload_oid = ObjectId(upload_id)
+    except errors.InvalidId:
+        logger.warning("Ignoring file upload event with invalid id %s", upload_id)
+        return
+
+    # Claim the upload; a redelivered event for a claimed upload is a no-op,
+    # unless the claim's lease ran out because its processor died.
+    started_at = datetime.now()
+    lease_expired_before = started_at - timedelta(
+        seconds=settings.INGESTION_PROCESSING_LEASE_SECONDS
+    )
+    upload = await file_upload_collection.find_one_and_update(
+        {
+            "_id": upload_oid,
+            "$or": [
+                {"status": FileUploadStatus.PENDING},
+                {
+                    "status": FileUploadStatus.PROCESSING,
+                    "processing_started_at": {"$lt": lease_expired_before},
+                },
+            ],
+        },
+        {
+            "$set": {
+                "status": FileUploadStatus.PROCESSING,
+                "processing_started_at": started_at,
+                "processing_error": None,
+            }
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if not upload:
+        return
+
+    file_upload = FileUpload(**upload)
+    try:
+        result = await _index_file_upload(file_upload)
+    except asyncio.CancelledError:
+        # Release the claim, so the redelivered event processes the upload.
+        await asyncio.shield(
+            file_upload_collection.update_one(
+                {
+                    "_id": upload_oid,
+                    "status": FileUploadStatus.PROCESSING,
+                    "processing_started_at": started_at,
+                },
+                {"$set": {"status": FileUploadStatus.PENDING}},
+            )
+        )
+        raise
+    except Exception as e:
+        logger.exception("Failed to process file upload %s", upload_id)
+        await _finish_file_upload(
+            upload_oid, status=FileUploadStatus.FAILED, processing_error=str(e)
+        )
+        return
+
+    await _finish_file_upload(upload_oid, status=FileUploadStatus.PROCESSED, **result)
+    await bump_corpus_version(file_upload.business_id)
+
+
+async def _previous_version(file_upload: FileUpload) -> Optional[dict]:
+    """The latest processed upload of the same file to the same business."""
+    return await file_upload_collection.find_one(
+        {
+            "business_id": file_upload.business_id,
+            "file_url": str(file_upload.file_url),
+            "status": FileUploadStatus.PROCESSED,
+            "_id": {"$ne": file_upload.id},
+        },
+        projection={"_id": 1, "version": 1},
+        sort=[("version", -1), ("_id", -1)],
+    )
+
+
+async def _index_file_upload(file_upload: FileUpload) -> dict[str, Any]:
+    """
+    Index an upload's chunks, returning the fields to record on the upload:
+    the chunk count and, when an identical file was already processed, the
+    upload whose vectors were re-used.
+
+    With INGESTION_INCREMENTAL, an upload of a `file_url` the business already
+    has indexed is a new version of that document: it is diffed against the
+    indexed chunks, and the version and its predecessor are recorded too.
+    """
+    upload_id = str(file_upload.id)
+    business_id = str(file_upload.business_id)
+    file_url = str(file_upload.file_url)
+    # Checked again, as the file may have changed since it was uploaded.
+    path = resolve_upload_path(file_url)
+
+    content_hash = await asyncio.to_thread(hash_file, path)
+    await file_upload_collection.update_one(
+        {"_id": file_upload.id}, {"$set": {"content_hash": content_hash}}
+    )
+
+    indexer = await get_chunk_indexer()
+    result: dict[str, Any] = {}
+    indexed: dict[str, list[str]] = {}
+    if settings.INGESTION_INCREMENTAL:
+        previous = await _previous_version(file_upload)
+        result["version"] = (previous.get("version") or 1) + 1 if previous else 1
+        result["previous_version_id"] = previous["_id"] if previous else None
+        if previous:
+            # Marked before any of its points are handed on to this upload, so
+            # it is never used as an intact copy source again.
+            await file_upload_collection.update_one(
+                {"_id": previous["_id"]}, {"$set": {"superseded_by": file_upload.id}}
+            )
+        indexed = await indexed_chunk_hashes(
+            indexer.client, indexer.collection_name, business_id, file_url,
+            previous_upload_id=str(previous["_id"]) if previous else None,
+            batch_size=settings.INDEXING_BATCH_SIZE,
+        )
+
+    if not indexed:
+        # A superseded version's points were handed on to its successor.
+        source_upload = await file_upload_collection.find_one(
+            {
+                "content_hash": content_hash,
+                "status": FileUploadStatus.PROCESSED,
+                "superseded_by": None,
+                "_id": {"$ne": file_upload.id},
+            },
+            projection={"_id": 1, "chunk_count": 1},
+        )
+        if source_upload:
+            chunk_count = await copy_indexed_upload(
+                indexer.client, indexer.collection_name, str(source_upload["_id"]),
+                business_id, upload_id, file_url, batch_size=settings.INDEXING_BATCH_SIZE,
+            )
+            if chunk_count == source_upload.get("chunk_count"):
+                result["chunk_count"] = chunk_count
+                result["deduplicated_from"] = source_upload["_id"]
+                return result
+            # Copied points are overwritten by the full index below, as the
+            # point ids only depend on the upload and chunk index.
+            logger.warning(
+                "Upload %s has %s of its %s chunks indexed; indexing %s in full",
+                source_upload["_id"], chunk_count, source_upload.get("chunk_count"), upload_id,
+            )
+
+    result["chunk_count"], reused_chunk_count = await _index_chunks(
+        indexer, file_upload, path, indexed
+    )
+    if indexed:
+        result["reused_chunk_count"] = reused_chunk_count
+    return result
+
+
+async def _index_chunks(
+        indexer: ChunkIndexer, file_upload: FileUpload, path: Path,
+        indexed: dict[str, list[str]],
+) -> tuple[int, int]:
+    """
+    Stream an upload's chunks into the indexer, returning the chunk count and
+    how many of them were re-used.
+
+    `indexed` holds the point ids of the document's previous version by chunk
+    hash. Unchanged chunks keep their points, which are re-pointed at this
+    upload; only new or changed chunks are embedded and upserted, and the
+    points of chunks that are gone are deleted in bulk at the end.
+    """
+    upload_id = str(file_upload.id)
+    business_id = str(file_upload.business_id)
+    file_url = str(file_upload.file_url)
+
+    chunk_count = 0
+    reused_chunk_count = 0
+    pending_indexing = []
+    try:
+        chunks = iter_document_chunks(path, file_upload.file_type)
+        async for chunk_batch in iterate_in_thread(chunks, settings.INGESTION_BATCH_SIZE):
+            chunk_count += len(chunk_batch)
+            moves, records = [], []
+            for record in build_chunk_records(chunk_batch, business_id, upload_id, file_url):
+                point_ids = indexed.get(record.payload["chunk_hash"])
+                if point_ids:
+                    moves.append((point_ids.pop(), record))
+                else:
+                    records.append(record)
+            await reassign_chunks(indexer.client, indexer.collection_name, moves)
+            reused_chunk_count += len(moves)
+            pending_indexing.append(await indexer.submit(records))
+    finally:
+        results = await asyncio.gather(*pending_indexing, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    vanished = [point_id for point_ids in indexed.values() for point_id in point_ids]
+    await delete_chunks(indexer.client, indexer.collection_name, vanished)
+    return chunk_count, reused_chunk_count
@@ -0,0 +1,98 @@
+"""
+Kafka consumer worker, scaled separately from the API.
+
+    python -m app.worker [--processes N]
+
+Every process joins the same consumer group, so Kafka spreads partitions
+across them. SIGTERM or SIGINT lets each process finish and commit its
+current batch before exiting. Run the API with KAFKA_CONSUMERS_IN_API=false
+to leave all consumption to the workers.
+
+With WORKER_METRICS_PORT set, worker N serves its metrics on that port + N.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+from types import FrameType
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import start_metrics_server
+from app.core.startup_shutdown import close_ingestion_resources
+from app.db.mongo import close_mongo_client
+from app.kafka.consumers import drain_kafka_consumers, start_kafka_consumers
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(number: int = 0) -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    metrics_server = None
+    if settings.WORKER_METRICS_PORT:
+        metrics_server = await start_metrics_server(settings.WORKER_METRICS_PORT + number)
+    consumer_task = asyncio.create_task(start_kafka_consumers(stop_event=stop_event))
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # The consumer task also ends on its own if the consumer fails.
+    stop_requested = asyncio.create_task(stop_event.wait())
+    try:
+        await asyncio.wait({consumer_task, stop_requested}, return_when=asyncio.FIRST_COMPLETED)
+        stop_requested.cancel()
+        logger.info("Draining Kafka consumer")
+        await drain_kafka_consumers(
+            consumer_task, stop_event, timeout=settings.KAFKA_CONSUMER_DRAIN_TIMEOUT_SECONDS,
+        )
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await close_ingestion_resources()
+        close_mongo_client()
+
+
+def run_worker(number: int = 0) -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(number))
+
+
+def run_workers(processes: int) -> int:
+    """Run `processes` workers and forward stop signals to them."""
+    if processes <= 1:
+        run_worker()
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(number,), name=f"worker-{number}")
+        for number in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def stop_workers(signum: int, frame: Optional[FrameType]) -> None:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    signal.signal(signal.SIGINT, stop_workers)
+
+    for worker in workers:
+        worker.join()
+    return max((abs(worker.exitcode or 0) for worker in workers), default=0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run Kafka consumer worker processes.")
+    parser.add_argument(
+        "--processes", type=int, default=settings.WORKER_PROCESSES,
+        help="number of consumer processes (default: WORKER_PROCESSES)",
+    )
+    return run_workers(parser.parse_args().processes)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+"""
+Load test for query-embedding batching against a simulated provider.
+
+    python -m benchmarks.embedding_load_test [--requests N] [--latency-ms MS]
+
+Each simulated provider call costs a fixed round trip plus a small per-text
+cost, and at most `--max-concurrent-calls` calls run at once, as a provider
+rate limit would allow. The table compares throughput of direct calls with
+BatchingEmbedder at increasing concurrency.
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.ingestion.embedding_batcher import BatchingEmbedder
+from app.ingestion.embeddings import Embedder, HashEmbedder
+
+
+class SimulatedProviderEmbedder:
+    def __init__(self, latency: float, per_text_latency: float, max_concurrent_calls: int):
+        self._embedder = HashEmbedder()
+        self.model = self._embedder.model
+        self.dimensions = self._embedder.dimensions
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self._calls = asyncio.Semaphore(max_concurrent_calls)
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        async with self._calls:
+            await asyncio.sleep(self.latency + self.per_text_latency * len(texts))
+            return await self._embedder.embed(texts)
+
+
+async def run_load(embedder: Embedder, requests: int, concurrency: int) -> float:
+    """Embed `requests` single questions from `concurrency` workers; return requests/s."""
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for number in remaining:
+            await embedder.embed([f"question {number}"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{'concurrency':>11} {'direct req/s':>13} {'batched req/s':>14} "
+          f"{'mean batch':>11} {'mean wait ms':>13}")
+    for concurrency in args.concurrency:
+        provider = SimulatedProviderEmbedder(
+            args.latency_ms / 1000, args.per_text_latency_ms / 1000, args.max_concurrent_calls,
+        )
+        direct = await run_load(provider, args.requests, concurrency)
+
+        batcher = BatchingEmbedder(
+            provider, max_batch_size=args.batch_size, max_delay=args.max_delay_ms / 1000,
+        )
+        batched = await run_load(batcher, args.requests, concurrency)
+        print(
+            f"{concurrency:>11} {direct:>13.0f} {batched:>14.0f} "
+            f"{batcher.batched_texts / batcher.batches:>11.1f} "
+            f"{batcher.total_wait / batcher.batched_requests * 1000:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query-embedding batching load test.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128, 512])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--per-text-latency-ms", type=float, default=0.05)
+    parser.add_argument("--max-concurrent-calls", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=settings.QUERY_EMBEDDING_BATCH_SIZE)
+    parser.add_argument(
+        "--max-delay-ms", type=float, default=settings.QUERY_EMBEDDING_MAX_BATCH_DELAY_MS,
+    )
+    asyncio.run(main(parser.parse_args()))
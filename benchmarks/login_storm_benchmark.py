@@ -0,0 +1,134 @@
+"""
+Latency of an unrelated endpoint during a login storm.
+
+    python -m benchmarks.login_storm_benchmark [--logins N] [--concurrency C ...]
+
+Runs bursts of concurrent bcrypt verifications, the CPU-bound part of
+`/login`, while probing `/health` through the ASGI app every few
+milliseconds. A probe's latency counts from when it was due, so time the
+event loop spent blocked before sending it is included.
+
+Each storm runs twice: verifying inline on the event loop, as the login path
+did before hashing moved to `password_hash_executor`, and through
+`verify_password_async`. The table shows `/health` latency percentiles,
+first with no logins, and the login throughput of each run; rejected logins
+are those over PASSWORD_HASH_MAX_PENDING.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password, verify_password_async
+from app.main import app
+
+PASSWORD = "login-storm-password"
+
+
+async def _verify_inline(hashed_password: str) -> bool:
+    return verify_password(PASSWORD, hashed_password)
+
+
+async def _verify_in_executor(hashed_password: str) -> bool:
+    return await verify_password_async(PASSWORD, hashed_password)
+
+
+async def probe_health(
+        client: httpx.AsyncClient, stop: asyncio.Event, interval: float,
+) -> list[float]:
+    """Request `/health` every `interval` seconds until `stop` is set; return latencies."""
+    latencies = []
+    due = time.perf_counter()
+    while True:
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - due)
+        # Checked after the request, so a probe delayed until the end still counts.
+        if stop.is_set():
+            return latencies
+        due += interval
+
+
+async def measure_idle(client: httpx.AsyncClient, duration: float, interval: float) -> list[float]:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_health(client, stop, interval))
+    await asyncio.sleep(duration)
+    stop.set()
+    return await probe
+
+
+async def run_storm(
+        client: httpx.AsyncClient, verify: Callable[[str], Awaitable[bool]],
+        hashed_password: str, logins: int, concurrency: int, probe_interval: float,
+) -> tuple[list[float], float, int]:
+    """Return the `/health` latencies, logins/s and the number of rejected logins."""
+    remaining = iter(range(logins))
+    rejected = 0
+
+    async def login_worker() -> None:
+        nonlocal rejected
+        for _ in remaining:
+            # Stands in for the user lookup that precedes the check.
+            await asyncio.sleep(0)
+            try:
+                await verify(hashed_password)
+            except HTTPException:
+                rejected += 1
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_health(client, stop, probe_interval))
+    start = time.perf_counter()
+    await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    latencies = await probe
+    return latencies, (logins - rejected) / elapsed, rejected
+
+
+def _latency_columns(latencies: list[float]) -> str:
+    if len(latencies) < 2:
+        latencies = latencies * 2  # quantiles() needs two points
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return (
+        f"{percentiles[49] * 1000:>8.1f} {percentiles[98] * 1000:>8.1f} "
+        f"{max(latencies) * 1000:>8.1f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed_password = hash_password(PASSWORD)
+    interval = args.probe_interval_ms / 1000
+    print(
+        f"{'concurrency':>11} {'mode':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+        f"{'logins/s':>9} {'rejected':>9}"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        idle = await measure_idle(client, duration=1.0, interval=interval)
+        print(f"{0:>11} {'idle':>9} {_latency_columns(idle)} {'-':>9} {'-':>9}")
+        for concurrency in args.concurrency:
+            for mode, verify in [("inline", _verify_inline), ("executor", _verify_in_executor)]:
+                latencies, throughput, rejected = await run_storm(
+                    client, verify, hashed_password, args.logins, concurrency, interval,
+                )
+                print(
+                    f"{concurrency:>11} {mode:>9} {_latency_columns(latencies)} "
+                    f"{throughput:>9.1f} {rejected:>9}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unrelated-endpoint latency during logins.")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+",
+        default=[8, settings.PASSWORD_HASH_MAX_PENDING, settings.PASSWORD_HASH_MAX_PENDING * 2],
+    )
+    parser.add_argument("--probe-interval-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""
+PDF parsing throughput across parse worker counts.
+
+    python -m benchmarks.parse_benchmark [--pages N] [--workers W ...]
+
+Writes a fixture PDF of `--pages` text pages to a temporary directory, then
+parses it in-thread with `iter_pdf_pages` and with `iter_pdf_pages_parallel`
+on a spawn process pool of each worker count, and prints pages/s. Pool
+start-up is excluded: every pool parses a one-page warm-up range first.
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from app.core.config import settings
+from app.ingestion.parsers import extract_pdf_page_range, iter_pdf_pages, iter_pdf_pages_parallel
+
+_LINES_PER_PAGE = 45
+_WORDS = (
+    "policy coverage claim premium deductible renewal insured benefit exclusion period "
+    "document section clause schedule endorsement limit notice payment holder agreement"
+).split()
+
+
+def _page_lines(page_number: int) -> Iterator[str]:
+    for line in range(_LINES_PER_PAGE):
+        words = (_WORDS[(page_number * 7 + line * 3 + i) % len(_WORDS)] for i in range(12))
+        yield f"{page_number}.{line} " + " ".join(words)
+
+
+def _content_stream(page_number: int) -> bytes:
+    lines = [b"BT /F1 10 Tf 12 TL 50 770 Td"]
+    for text in _page_lines(page_number):
+        lines.append(f"({text}) Tj T*".encode("ascii"))
+    lines.append(b"ET")
+    return b"\n".join(lines)
+
+
+def write_fixture_pdf(path: Path, pages: int) -> None:
+    """Write a `pages`-page PDF of plain Helvetica text, without a PDF library."""
+    # Objects 1-3 are the catalog, the page tree and the font; each page then
+    # takes a page object and its content stream.
+    page_ids = [4 + 2 * index for index in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids)
+        + b"] /Count %d >>" % pages,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_number, page_id in enumerate(page_ids, start=1):
+        stream = _content_stream(page_number)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /CropBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref_offset,
+    )
+    path.write_bytes(output)
+
+
+def measure_pages_per_second(pages: Iterator) -> float:
+    start = time.perf_counter()
+    count = sum(1 for _ in pages)
+    return count / (time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "fixture.pdf"
+        write_fixture_pdf(path, args.pages)
+        print(f"{args.pages} pages, {path.stat().st_size / 1024:.0f} KiB")
+        print(f"{'workers':>7} {'pages/s':>8} {'speedup':>8}")
+
+        in_thread = measure_pages_per_second(iter_pdf_pages(path))
+        print(f"{'thread':>7} {in_thread:>8.1f} {1.0:>8.2f}")
+
+        for workers in args.workers:
+            with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                warm_up = [
+                    executor.submit(extract_pdf_page_range, path, 1, 1) for _ in range(workers)
+                ]
+                for future in warm_up:
+                    future.result()
+                rate = measure_pages_per_second(iter_pdf_pages_parallel(
+                    path, executor, args.pages_per_task, max_in_flight=args.max_in_flight,
+                ))
+            print(f"{workers:>7} {rate:>8.1f} {rate / in_thread:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF parsing throughput by worker count.")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pages-per-task", type=int, default=settings.INGESTION_PDF_PAGES_PER_TASK)
+    parser.add_argument(
+        "--max-in-flight", type=int, default=settings.INGESTION_PARSE_MAX_IN_FLIGHT,
+    )
+    main(parser.parse_args())
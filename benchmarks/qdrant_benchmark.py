@@ -0,0 +1,169 @@
+"""
+Benchmark of chunk collection layouts on a synthetic corpus.
+
+    python -m benchmarks.qdrant_benchmark [--points 1000000] [--dimensions 256]
+
+For every layout (quantization none/scalar/binary, originals in RAM or on
+disk) it fills a scratch collection with random unit vectors spread over
+`--businesses` tenants and runs tenant-filtered searches. It reports memory
+and search latency. Run it against a Qdrant server (QDRANT_URL or --url);
+Qdrant's local mode (":memory:") ignores quantization and payload indexes,
+so there every layout is the same brute-force search.
+
+Memory is the server's resident memory growth taken from its /metrics, or
+this process's own for local mode. The "vectors" column is the expected
+in-RAM size of the vectors alone.
+"""
+import argparse
+import asyncio
+import time
+import urllib.request
+import uuid
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.qdrant import CollectionLayout, ensure_collection
+
+LAYOUTS = [
+    CollectionLayout(quantization="none", on_disk=False),
+    CollectionLayout(quantization="scalar", on_disk=False),
+    CollectionLayout(quantization="scalar", on_disk=True),
+    CollectionLayout(quantization="binary", on_disk=True),
+]
+
+
+def resident_bytes(url: str) -> Optional[int]:
+    if url == ":memory:":
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * 4096
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/metrics", timeout=5) as response:
+            for line in response.read().decode("utf-8").splitlines():
+                if line.startswith("memory_resident_bytes"):
+                    return int(float(line.split()[-1]))
+    except OSError:
+        return None
+    return None
+
+
+def expected_vector_bytes(layout: CollectionLayout, points: int, dimensions: int) -> int:
+    original = 0 if layout.on_disk else points * dimensions * 4
+    quantized = {
+        "none": 0, "scalar": points * dimensions, "binary": points * dimensions // 8,
+    }[layout.quantization]
+    return original + quantized
+
+
+def random_vectors(generator: np.random.Generator, count: int, dimensions: int) -> np.ndarray:
+    vectors = generator.standard_normal((count, dimensions), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def fill_collection(
+        client, collection_name: str, args: argparse.Namespace,
+        generator: np.random.Generator,
+) -> None:
+    from qdrant_client import models
+
+    for start in range(0, args.points, args.batch_size):
+        count = min(args.batch_size, args.points - start)
+        vectors = random_vectors(generator, count, args.dimensions)
+        await client.upsert(
+            collection_name,
+            points=[
+                models.PointStruct(
+                    id=str(uuid.UUID(int=start + offset + 1)),
+                    vector=vector.tolist(),
+                    payload={
+                        "business_id": f"business-{(start + offset) % args.businesses}",
+                        "upload_id": f"upload-{(start + offset) // 1000}",
+                    },
+                )
+                for offset, vector in enumerate(vectors)
+            ],
+            wait=False,
+        )
+
+    # Wait for indexing and quantization to finish before measuring.
+    while (await client.get_collection(collection_name)).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(1)
+
+
+async def measure_searches(
+        client, collection_name: str, layout: CollectionLayout, args: argparse.Namespace,
+        generator: np.random.Generator,
+) -> list[float]:
+    from qdrant_client import models
+
+    latencies = []
+    for number, vector in enumerate(random_vectors(generator, args.searches, args.dimensions)):
+        business_id = f"business-{number % args.businesses}"
+        start = time.perf_counter()
+        await client.query_points(
+            collection_name,
+            query=vector.tolist(),
+            query_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="business_id", match=models.MatchValue(value=business_id)
+                    )
+                ]
+            ),
+            limit=settings.ASK_TOP_K,
+            search_params=layout.search_params(),
+        )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    from qdrant_client import AsyncQdrantClient
+
+    if args.url == ":memory:":
+        client = AsyncQdrantClient(location=":memory:")
+    else:
+        client = AsyncQdrantClient(url=args.url, timeout=300)
+    generator = np.random.default_rng(0)
+
+    print(f"{args.points} points, {args.dimensions} dimensions, {args.businesses} businesses")
+    print(f"{'quantization':>12} {'on disk':>7} {'vectors MiB':>11} {'RSS +MiB':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7}")
+    try:
+        for layout in LAYOUTS:
+            collection_name = f"benchmark_{layout.quantization}_{int(layout.on_disk)}"
+            await client.delete_collection(collection_name)
+            memory_before = resident_bytes(args.url)
+            await ensure_collection(client, collection_name, args.dimensions, layout=layout)
+            await fill_collection(client, collection_name, args, generator)
+            memory_after = resident_bytes(args.url)
+
+            latencies = np.array(
+                await measure_searches(client, collection_name, layout, args, generator)
+            )
+            memory_growth = (
+                f"{(memory_after - memory_before) / 2 ** 20:>9.0f}"
+                if memory_before is not None and memory_after is not None else f"{'n/a':>9}"
+            )
+            vector_bytes = expected_vector_bytes(layout, args.points, args.dimensions)
+            print(
+                f"{layout.quantization:>12} {str(layout.on_disk):>7} "
+                f"{vector_bytes / 2 ** 20:>11.0f} {memory_growth} "
+                f"{np.percentile(latencies, 50) * 1000:>7.2f} "
+                f"{np.percentile(latencies, 99) * 1000:>7.2f}"
+            )
+            await client.delete_collection(collection_name)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant chunk collection layouts.")
+    parser.add_argument("--url", default=settings.QDRANT_URL)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--businesses", type=int, default=1000)
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
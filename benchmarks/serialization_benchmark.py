@@ -0,0 +1,75 @@
+"""
+Response serialization micro-benchmark.
+
+    python -m benchmarks.serialization_benchmark [--count N] [--repeat R]
+
+Serializes `--count` Business and BusinessUserMapping models, built the way
+the services build them from Mongo documents, through FastAPI's default
+`response_model` path (re-validation, `jsonable_encoder`, `JSONResponse`)
+and through `ORJSONResponse`, the app's default response class. Prints the
+best of `--repeat` runs in milliseconds.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import ORJSONResponse
+from app.constants import UserRole
+from app.models.schemas import Business, BusinessUserMapping
+
+
+def businesses(count: int) -> list[Business]:
+    return [Business(_id=ObjectId(), name=f"Business {number}") for number in range(count)]
+
+
+def mappings(count: int) -> list[BusinessUserMapping]:
+    return [
+        BusinessUserMapping(
+            user_id=ObjectId(), business_id=ObjectId(), role=UserRole.USER,
+            joined_at=datetime.now(), approved_by=ObjectId() if number % 2 else None,
+        )
+        for number in range(count)
+    ]
+
+
+async def best_of(repeat: int, render: Callable[[], Awaitable[Any]]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await render()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{'model':>19} {'fastapi ms':>11} {'orjson ms':>10}")
+    for model, items in [
+        (Business, businesses(args.count)),
+        (BusinessUserMapping, mappings(args.count)),
+    ]:
+        field = create_model_field(name="Response", type_=list[model], mode="serialization")
+
+        async def fastapi_default() -> bytes:
+            content = await serialize_response(field=field, response_content=items)
+            return JSONResponse(content).body
+
+        async def orjson_response() -> bytes:
+            return ORJSONResponse(items).body
+
+        default = await best_of(args.repeat, fastapi_default)
+        direct = await best_of(args.repeat, orjson_response)
+        print(f"{model.__name__:>19} {default * 1000:>11.1f} {direct * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark.")
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Cold-start budget check for the API process.
+
+`python -m benchmarks.startup_budget` measures, each in a fresh interpreter,
+how long `import app.main` takes and how long uvicorn takes to answer
+`/health`. It exits non-zero when either goes over STARTUP_IMPORT_BUDGET_MS
+or STARTUP_HEALTHY_BUDGET_MS. The health check needs the same Mongo and
+Kafka as a normal start.
+"""
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from app.core.config import settings
+
+_IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import_seconds() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT], check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_healthy_seconds(timeout: float) -> float | None:
+    """Seconds from launching uvicorn to a 200 from `/health`, or None on timeout."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.05)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    import_budget = settings.STARTUP_IMPORT_BUDGET_MS / 1000
+    healthy_budget = settings.STARTUP_HEALTHY_BUDGET_MS / 1000
+    failed = False
+
+    import_seconds = measure_import_seconds()
+    print(f"import app.main: {import_seconds * 1000:.0f} ms (budget {import_budget * 1000:.0f} ms)")
+    failed |= import_seconds > import_budget
+
+    # Wait a little past the budget so the report shows by how much it was missed.
+    healthy_seconds = measure_healthy_seconds(timeout=healthy_budget * 2)
+    if healthy_seconds is None:
+        print(f"/health: not healthy within {healthy_budget * 2 * 1000:.0f} ms")
+        failed = True
+    else:
+        print(
+            f"/health: {healthy_seconds * 1000:.0f} ms (budget {healthy_budget * 1000:.0f} ms)"
+        )
+        failed |= healthy_seconds > healthy_budget
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
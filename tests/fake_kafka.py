@@ -0,0 +1,99 @@
+"""
+In-process stand-in for `AIOKafkaConsumer`, covering the calls
+`app.kafka.consumers` makes: fetching with `getmany`, committing, pausing,
+and a rebalance listener that can be triggered with `rebalance`.
+"""
+import asyncio
+from typing import Optional
+
+from aiokafka import ConsumerRebalanceListener, ConsumerRecord, TopicPartition
+from aiokafka.errors import CommitFailedError
+
+
+def make_record(
+        topic_partition: TopicPartition, offset: int, key: Optional[bytes], value: bytes = b"{}",
+) -> ConsumerRecord:
+    return ConsumerRecord(
+        topic=topic_partition.topic, partition=topic_partition.partition, offset=offset,
+        timestamp=0, timestamp_type=0, key=key, value=value, checksum=None,
+        serialized_key_size=len(key or b""), serialized_value_size=len(value), headers=[],
+    )
+
+
+class FakeConsumer:
+    def __init__(self):
+        self._records: dict[TopicPartition, list[ConsumerRecord]] = {}
+        # Index of the next record of each partition to fetch.
+        self._positions: dict[TopicPartition, int] = {}
+        self._paused: set[TopicPartition] = set()
+        self._assigned: set[TopicPartition] = set()
+        self._listener: Optional[ConsumerRebalanceListener] = None
+        # Committed offsets, in commit order.
+        self.commits: list[dict[TopicPartition, int]] = []
+        # The next this many commits raise CommitFailedError.
+        self.failing_commits = 0
+        self.started = False
+
+    def produce(self, topic_partition: TopicPartition, *keys: Optional[bytes]) -> None:
+        """Append one record per key to the partition, assigning the partition."""
+        records = self._records.setdefault(topic_partition, [])
+        for key in keys:
+            records.append(make_record(topic_partition, len(records), key))
+        self._assigned.add(topic_partition)
+
+    def committed(self, topic_partition: TopicPartition) -> Optional[int]:
+        for offsets in reversed(self.commits):
+            if topic_partition in offsets:
+                return offsets[topic_partition]
+        return None
+
+    async def rebalance(self, revoked: set[TopicPartition]) -> None:
+        """Revoke partitions like a group rebalance; nothing more is fetched from them."""
+        await self._listener.on_partitions_revoked(revoked)
+        self._assigned -= revoked
+        await self._listener.on_partitions_assigned(set(self._assigned))
+
+    def subscribe(self, topics: list[str], listener: ConsumerRebalanceListener) -> None:
+        self._listener = listener
+
+    async def start(self) -> None:
+        self.started = True
+
+    async def stop(self) -> None:
+        self.started = False
+
+    def assignment(self) -> set[TopicPartition]:
+        return set(self._assigned)
+
+    def pause(self, *partitions: TopicPartition) -> None:
+        self._paused.update(partitions)
+
+    def resume(self, *partitions: TopicPartition) -> None:
+        self._paused.difference_update(partitions)
+
+    def highwater(self, topic_partition: TopicPartition) -> Optional[int]:
+        return len(self._records.get(topic_partition, []))
+
+    async def getmany(
+            self, timeout_ms: int = 0, max_records: Optional[int] = None,
+    ) -> dict[TopicPartition, list[ConsumerRecord]]:
+        batch: dict[TopicPartition, list[ConsumerRecord]] = {}
+        remaining = max_records
+        if remaining is None:
+            remaining = sum(len(records) for records in self._records.values())
+        for topic_partition in self._assigned - self._paused:
+            position = self._positions.get(topic_partition, 0)
+            records = self._records[topic_partition][position:position + remaining]
+            if records:
+                batch[topic_partition] = records
+                self._positions[topic_partition] = position + len(records)
+                remaining -= len(records)
+        if not batch:
+            await asyncio.sleep(timeout_ms / 1000)
+        return batch
+
+    async def commit(self, offsets: dict[TopicPartition, int]) -> None:
+        if self.failing_commits:
+            self.failing_commits -= 1
+            raise CommitFailedError("The group rebalanced before the commit")
+        self.commits.append(dict(offsets))
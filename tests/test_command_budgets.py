@@ -0,0 +1,171 @@
+"""
+Mongo command budgets per API endpoint.
+
+Calls every Mongo-backed endpoint once through the ASGI app, counts the
+commands it sends with `command_counter` and fails for any endpoint over its
+budget in COMMAND_BUDGETS. The token and membership caches are cleared before
+each call, so the counts are those of a cold request.
+
+Needs a Mongo server: MONGODB_TEST_URI if set, otherwise a throwaway `mongod`
+from PATH. Without either, the tests are skipped. Each run uses a database of
+its own and drops it afterwards.
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import httpx
+import pytest
+from pymongo import MongoClient
+
+from app.core.dependencies import token_cache
+from app.db import mongo
+from app.db.indexes import create_indexes
+from app.db.monitoring import command_counter
+from app.main import app
+from app.services.authorization_service import membership_cache
+
+# Route template -> the most Mongo commands one call may send. Authenticated
+# routes include the lookup of the token.
+COMMAND_BUDGETS = {
+    "POST /api/v1/signup": 1,
+    "POST /api/v1/login": 2,
+    "POST /api/v1/business": 3,
+    "GET /api/v1/business": 2,
+    "GET /api/v1/business/search": 1,
+    "GET /api/v1/business/{business_id}": 2,
+    "POST /api/v1/business/join/{business_id}/{role}": 2,
+    "GET /api/v1/business/join_requests/{business_id}": 3,
+    "POST /api/v1/business/join_requests/{business_id}/accept/{user_id}": 3,
+    "POST /api/v1/logout": 2,
+}
+
+
+class BudgetCheck:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.counts: dict[str, int] = {}
+
+    async def call(
+            self, route: str, token: Optional[str] = None, json: Any = None,
+            params: Optional[dict] = None, **path_params: str,
+    ) -> Any:
+        """Call `route` with its path parameters filled in and record its command count."""
+        method, path = route.split(" ", 1)
+        headers = {"Authorization": f"Token {token}"} if token else {}
+        token_cache.clear()
+        membership_cache.clear()
+        command_counter.reset()
+        response = await self.client.request(
+            method, path.format(**path_params), json=json, params=params, headers=headers,
+        )
+        self.counts[route] = max(self.counts.get(route, 0), command_counter.total())
+        response.raise_for_status()
+        return response.json()
+
+    async def sign_up(self, email: str) -> str:
+        credentials = {"email": email, "password": uuid.uuid4().hex}
+        await self.call("POST /api/v1/signup", json=credentials)
+        return (await self.call("POST /api/v1/login", json=credentials))["token"]
+
+
+async def run_endpoints(check: BudgetCheck) -> None:
+    """Exercise every budgeted endpoint as an owner and a member of a new business."""
+    owner_token = await check.sign_up("budget-owner@example.com")
+    member_token = await check.sign_up("budget-member@example.com")
+
+    business = await check.call(
+        "POST /api/v1/business", owner_token, json={"name": "Budget check"},
+    )
+    business_id = business["_id"]
+    await check.call("GET /api/v1/business", owner_token)
+    await check.call("GET /api/v1/business/search", params={"query": "budget check"})
+    await check.call("GET /api/v1/business/{business_id}", owner_token, business_id=business_id)
+
+    await check.call(
+        "POST /api/v1/business/join/{business_id}/{role}", member_token,
+        business_id=business_id, role="user",
+    )
+    await check.call(
+        "GET /api/v1/business/join_requests/{business_id}", owner_token, business_id=business_id,
+    )
+    member = await mongo.user_collection.find_one(
+        {"email": "budget-member@example.com"}, projection={"_id": 1},
+    )
+    await check.call(
+        "POST /api/v1/business/join_requests/{business_id}/accept/{user_id}", owner_token,
+        business_id=business_id, user_id=str(member["_id"]),
+    )
+    await check.call("POST /api/v1/logout", member_token)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_mongo(uri: str, timeout: float = 30.0) -> None:
+    with MongoClient(uri, serverSelectionTimeoutMS=int(timeout * 1000)) as client:
+        client.admin.command("ping")
+
+
+@pytest.fixture(scope="module")
+def mongo_uri(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    if os.environ.get("MONGODB_TEST_URI"):
+        yield os.environ["MONGODB_TEST_URI"]
+        return
+
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        pytest.skip("needs MONGODB_TEST_URI or a mongod on PATH")
+    data_directory: Path = tmp_path_factory.mktemp("mongod")
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            mongod, "--dbpath", str(data_directory), "--port", str(port),
+            "--bind_ip", "127.0.0.1", "--quiet",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        _wait_for_mongo(uri)
+        yield uri
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@pytest.fixture(scope="module")
+def command_counts(mongo_uri: str) -> dict[str, int]:
+    database = f"ayq_budgets_{uuid.uuid4().hex[:12]}"
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(mongo, "MONGO_URI", mongo_uri)
+        monkeypatch.setattr(mongo, "MONGO_DB_NAME", database)
+
+        async def scenario() -> dict[str, int]:
+            await create_indexes()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                    transport=transport, base_url="http://budget-check",
+            ) as client:
+                check = BudgetCheck(client)
+                try:
+                    await run_endpoints(check)
+                finally:
+                    await mongo.get_mongo_client().drop_database(database)
+                    mongo.close_mongo_client()
+            return check.counts
+
+        return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("route", COMMAND_BUDGETS)
+def test_endpoint_stays_within_its_command_budget(command_counts: dict[str, int], route: str):
+    assert command_counts[route] <= COMMAND_BUDGETS[route]
@@ -0,0 +1,51 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.core.metrics import embedding_cache_lookups
+from app.ingestion.embedding_cache import CachedEmbedder, open_embedding_cache
+from app.ingestion.embeddings import HashEmbedder
+
+DIMENSIONS = 16
+
+
+def lookups(result: str) -> float:
+    return embedding_cache_lookups._values.get((result,), 0)
+
+
+def test_repeated_texts_are_served_from_the_cache(tmp_path: Path):
+    embedder = HashEmbedder(dimensions=DIMENSIONS)
+    cache = open_embedding_cache(
+        tmp_path, embedder.model, DIMENSIONS, max_entries=10, max_shards=1,
+    )
+    cached_embedder = CachedEmbedder(embedder, cache)
+    hits, misses = lookups("hit"), lookups("miss")
+
+    async def scenario():
+        first = await cached_embedder.embed(["a question", "another", "a question"])
+        second = await cached_embedder.embed(["another", "a  question"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    # Cached vectors come back as float32.
+    assert second[0] == pytest.approx(first[1], abs=1e-6)
+    assert second[1] == pytest.approx(first[0], abs=1e-6)
+    assert (lookups("hit") - hits, lookups("miss") - misses) == (2, 2)
+
+    cache.close()
+    reopened = open_embedding_cache(
+        tmp_path, embedder.model, DIMENSIONS, max_entries=10, max_shards=1,
+    )
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_processes_beyond_the_shard_cap_run_without_a_cache(tmp_path: Path):
+    shards = [
+        open_embedding_cache(tmp_path, "model", DIMENSIONS, max_entries=10, max_shards=2)
+        for _ in range(3)
+    ]
+    assert shards[2] is None
+    for shard in shards[:2]:
+        shard.close()
@@ -0,0 +1,185 @@
+import asyncio
+from typing import Callable
+
+import pytest
+from aiokafka import ConsumerRecord, TopicPartition
+
+from app.core.config import settings
+from app.kafka import consumers
+from tests.fake_kafka import FakeConsumer
+
+TP0 = TopicPartition("file_upload_created", 0)
+TP1 = TopicPartition("file_upload_created", 1)
+POLL_TIMEOUT_MS = 10
+
+
+class RecordingHandler:
+    """Stands in for `handle_message`, logging starts and ends and holding chosen messages."""
+
+    def __init__(self):
+        self.events: list[tuple[str, int, int]] = []
+        self._gates: dict[tuple[int, int], asyncio.Event] = {}
+
+    def hold(self, topic_partition: TopicPartition, offset: int) -> asyncio.Event:
+        """Keep the message at `offset` running until the returned event is set."""
+        gate = asyncio.Event()
+        self._gates[(topic_partition.partition, offset)] = gate
+        return gate
+
+    def ended(self, topic_partition: TopicPartition, offset: int) -> bool:
+        return ("end", topic_partition.partition, offset) in self.events
+
+    def started(self, topic_partition: TopicPartition, offset: int) -> bool:
+        return ("start", topic_partition.partition, offset) in self.events
+
+    async def __call__(self, message: ConsumerRecord) -> None:
+        self.events.append(("start", message.partition, message.offset))
+        gate = self._gates.get((message.partition, message.offset))
+        if gate is not None:
+            await gate.wait()
+        else:
+            await asyncio.sleep(0)
+        self.events.append(("end", message.partition, message.offset))
+
+
+@pytest.fixture
+def handler(monkeypatch: pytest.MonkeyPatch) -> RecordingHandler:
+    monkeypatch.setattr(settings, "KAFKA_CONSUMER_POLL_TIMEOUT_MS", POLL_TIMEOUT_MS)
+    monkeypatch.setattr(settings, "KAFKA_CONSUMER_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "KAFKA_CONSUMER_MAX_IN_FLIGHT", 100)
+    recording_handler = RecordingHandler()
+    monkeypatch.setattr(consumers, "handle_message", recording_handler)
+    return recording_handler
+
+
+async def eventually(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached in time"
+        await asyncio.sleep(POLL_TIMEOUT_MS / 1000)
+
+
+async def a_few_polls() -> None:
+    await asyncio.sleep(POLL_TIMEOUT_MS * 5 / 1000)
+
+
+def test_messages_with_the_same_key_run_in_order(handler: RecordingHandler):
+    async def scenario():
+        consumer = FakeConsumer()
+        consumer.produce(TP0, b"a", b"b", b"a")
+        gate = handler.hold(TP0, 0)
+        stop = asyncio.Event()
+        task = asyncio.create_task(consumers.start_kafka_consumers(consumer, stop))
+
+        # Another key is not held up by the slow message...
+        await eventually(lambda: handler.ended(TP0, 1))
+        # ...but the next message with its key is.
+        assert not handler.started(TP0, 2)
+
+        gate.set()
+        await eventually(lambda: handler.ended(TP0, 2))
+        assert handler.events.index(("start", 0, 2)) > handler.events.index(("end", 0, 0))
+
+        stop.set()
+        await task
+        assert consumer.committed(TP0) == 3
+
+    asyncio.run(scenario())
+
+
+def test_commits_stop_at_the_lowest_message_in_flight(handler: RecordingHandler):
+    async def scenario():
+        consumer = FakeConsumer()
+        consumer.produce(TP0, b"0", b"1", b"2", b"3")
+        consumer.produce(TP1, b"4")
+        gate = handler.hold(TP0, 1)
+        stop = asyncio.Event()
+        task = asyncio.create_task(consumers.start_kafka_consumers(consumer, stop))
+
+        await eventually(lambda: handler.ended(TP0, 3) and consumer.committed(TP0) == 1)
+        # Other partitions are committed past it.
+        await eventually(lambda: consumer.committed(TP1) == 1)
+        await a_few_polls()
+        assert all(offsets.get(TP0, 0) <= 1 for offsets in consumer.commits)
+
+        gate.set()
+        await eventually(lambda: consumer.committed(TP0) == 4)
+
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_failed_commits_during_a_rebalance_keep_the_consumer_running(
+        handler: RecordingHandler,
+):
+    async def scenario():
+        consumer = FakeConsumer()
+        consumer.failing_commits = 1
+        consumer.produce(TP0, b"a", b"b")
+        consumer.produce(TP1, b"c")
+        gate = handler.hold(TP1, 0)
+        stop = asyncio.Event()
+        task = asyncio.create_task(consumers.start_kafka_consumers(consumer, stop))
+
+        # The first commit fails; a later one catches up.
+        await eventually(lambda: consumer.committed(TP0) == 2)
+
+        # The commit on revoke fails too, while a message of the revoked
+        # partition is still running.
+        consumer.failing_commits = 1
+        await consumer.rebalance({TP1})
+        gate.set()
+        await eventually(lambda: handler.ended(TP1, 0))
+        await a_few_polls()
+        # Left for the partition's new owner to redeliver.
+        assert not consumer.committed(TP1)
+
+        consumer.produce(TP0, b"d")
+        await eventually(lambda: consumer.committed(TP0) == 3)
+        assert not task.done()
+
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_stopping_drains_messages_in_flight_and_commits_them(handler: RecordingHandler):
+    async def scenario():
+        consumer = FakeConsumer()
+        consumer.produce(TP0, b"a", b"b")
+        gate = handler.hold(TP0, 0)
+        stop = asyncio.Event()
+        task = asyncio.create_task(consumers.start_kafka_consumers(consumer, stop))
+        await eventually(lambda: handler.started(TP0, 0))
+
+        drain = asyncio.create_task(consumers.drain_kafka_consumers(task, stop, timeout=5))
+        await a_few_polls()
+        assert not task.done()
+
+        gate.set()
+        await drain
+        assert consumer.committed(TP0) == 2
+        assert not consumer.started
+
+    asyncio.run(scenario())
+
+
+def test_draining_past_the_timeout_cancels_without_committing(handler: RecordingHandler):
+    async def scenario():
+        consumer = FakeConsumer()
+        consumer.produce(TP0, b"a", b"b")
+        handler.hold(TP0, 0)
+        stop = asyncio.Event()
+        task = asyncio.create_task(consumers.start_kafka_consumers(consumer, stop))
+        await eventually(lambda: handler.ended(TP0, 1))
+
+        await consumers.drain_kafka_consumers(task, stop, timeout=0.05)
+        assert task.done()
+        assert not handler.ended(TP0, 0)
+        assert not consumer.committed(TP0)
+        assert not consumer.started
+
+    asyncio.run(scenario())
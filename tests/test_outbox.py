@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+
+from app.kafka.outbox import OutboxRelay, outbox_fields
+from app.kafka.schemas import KafkaFileUploadCreationEvent
+
+
+class FakeOutboxCollection:
+    """The `find_one_and_update` and `update_many` calls `OutboxRelay` makes, in memory."""
+
+    name = "file_upload"
+
+    def __init__(self, count: int):
+        self.documents = [
+            {
+                "_id": ObjectId(),
+                **outbox_fields(
+                    "file_upload_created", str(number),
+                    KafkaFileUploadCreationEvent(upload_id=str(number), source_service="test"),
+                ),
+            }
+            for number in range(count)
+        ]
+
+    @staticmethod
+    def _claimable(document: dict, now: datetime) -> bool:
+        claimed_until = document.get("outbox", {}).get("claimed_until")
+        return document["outbox_pending"] and not (claimed_until and claimed_until > now)
+
+    async def find_one_and_update(self, query, update, projection, sort) -> Optional[dict]:
+        await asyncio.sleep(0)
+        now = query["outbox.claimed_until"]["$not"]["$gt"]
+        for document in sorted(self.documents, key=lambda document: document["_id"]):
+            if self._claimable(document, now):
+                document["outbox"]["claimed_until"] = update["$set"]["outbox.claimed_until"]
+                return {"_id": document["_id"], "outbox": dict(document["outbox"])}
+        return None
+
+    async def update_many(self, query, update) -> None:
+        await asyncio.sleep(0)
+        for document in self.documents:
+            if document["_id"] not in query["_id"]["$in"]:
+                continue
+            if "outbox_pending" in query and not document["outbox_pending"]:
+                continue
+            document.update(update.get("$set", {}))
+            if "outbox" in update.get("$unset", {}):
+                document.pop("outbox")
+            if "outbox.claimed_until" in update.get("$unset", {}):
+                document["outbox"].pop("claimed_until", None)
+
+
+class FakeProducerService:
+    def __init__(self, failing_keys: frozenset[str] = frozenset()):
+        self.sent: list[str] = []
+        self.failing_keys = failing_keys
+
+    async def send_message(self, topic: str, key: str, value: str) -> asyncio.Future:
+        delivery = asyncio.get_running_loop().create_future()
+        if key in self.failing_keys:
+            delivery.set_exception(ConnectionError("broker unavailable"))
+        else:
+            self.sent.append(key)
+            delivery.set_result(None)
+        return delivery
+
+
+def make_relay(producer_service, collection, batch_size: int = 10) -> OutboxRelay:
+    return OutboxRelay(
+        producer_service, [collection], batch_size=batch_size, poll_interval=1,
+        claim_seconds=60,
+    )
+
+
+def test_relays_on_several_replicas_publish_each_event_once():
+    async def scenario():
+        collection = FakeOutboxCollection(count=25)
+        producers = [FakeProducerService() for _ in range(3)]
+        relays = [make_relay(producer, collection) for producer in producers]
+
+        while any(document["outbox_pending"] for document in collection.documents):
+            await asyncio.gather(*(relay.publish_pending(collection) for relay in relays))
+
+        sent = [key for producer in producers for key in producer.sent]
+        assert sorted(sent) == sorted(str(number) for number in range(25))
+        assert all("outbox" not in document for document in collection.documents)
+
+    asyncio.run(scenario())
+
+
+def test_failed_events_stay_pending_and_are_released_for_the_next_poll():
+    async def scenario():
+        collection = FakeOutboxCollection(count=3)
+        relay = make_relay(FakeProducerService(failing_keys=frozenset({"1"})), collection)
+
+        assert await relay.publish_pending(collection) == 2
+        pending = [document for document in collection.documents if document["outbox_pending"]]
+        assert [document["outbox"]["key"] for document in pending] == ["1"]
+        assert "claimed_until" not in pending[0]["outbox"]
+
+        relay.producer_service = FakeProducerService()
+        assert await relay.publish_pending(collection) == 1
+        assert relay.producer_service.sent == ["1"]
+
+    asyncio.run(scenario())